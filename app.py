@@ -1,12 +1,13 @@
 import streamlit as st
 import json
 import os
-from utils.translations import get_text, LANGUAGES
-from utils.groq_client import get_groq_response
+from utils.translations import LANGUAGES
+from utils.groq_client import get_groq_response, stream_groq_response
 from utils.weather import get_weather
 from utils.offline_search import search_offline
 from utils.query_logger import log_query
 from utils.market_prices import get_market_prices
+from utils import resources
 import datetime
 
 # ── Page config ──────────────────────────────────────────────────────────────
@@ -17,9 +18,11 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
+# ── Warm up corpus, model and index in the background (once per server) ─────
+resources.start_warmup()
+
 # ── Load CSS ──────────────────────────────────────────────────────────────────
-with open("static/style.css") as f:
-    st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
+st.markdown(f"<style>{resources.load_css()}</style>", unsafe_allow_html=True)
 
 # ── Session State Defaults ────────────────────────────────────────────────────
 if "language" not in st.session_state:
@@ -36,7 +39,24 @@ if "active_page" not in st.session_state:
     st.session_state.active_page = "home"
 
 lang = st.session_state.language
-t = lambda key: get_text(key, lang)
+texts = resources.translation_table(lang)
+t = lambda key: texts.get(key, key)
+
+
+def show_result(result):
+    """Render an answer: offline text in a result box, a Groq stream as it arrives."""
+    if isinstance(result, str):
+        st.markdown(f'<div class="result-box">{result}</div>', unsafe_allow_html=True)
+        return result
+    with st.container(border=True):
+        return st.write_stream(result)
+
+
+def stream_chat_answer(container, question, context):
+    """Show the farmer's question in the chat and stream Groq's answer below it."""
+    with container:
+        st.markdown(f'<div class="chat-msg user-msg">👨‍🌾 {question}</div>', unsafe_allow_html=True)
+        return st.write_stream(stream_groq_response(question, lang, context=context))
 
 # ── Header ────────────────────────────────────────────────────────────────────
 st.markdown(f"""
@@ -247,10 +267,10 @@ elif active == "chatbot":
                     # ── Get AI answer ─────────────────────────────────────────
                     with st.spinner(t("thinking")):
                         offline_ans = search_offline(transcript)
-                        if st.session_state.online_mode:
-                            ans = get_groq_response(transcript, lang, context=offline_ans)
-                        else:
-                            ans = f"[{t('offline_mode')}]\n\n{offline_ans}"
+                    if st.session_state.online_mode:
+                        ans = stream_chat_answer(chat_container, transcript, offline_ans)
+                    else:
+                        ans = f"[{t('offline_mode')}]\n\n{offline_ans}"
 
                     st.session_state.chat_history.append({"role": "user",      "content": transcript})
                     st.session_state.chat_history.append({"role": "assistant", "content": ans})
@@ -282,7 +302,7 @@ elif active == "chatbot":
                 st.session_state.chat_history.append({"role": "user", "content": sq})
                 with st.spinner(t("thinking")):
                     offline_ans = search_offline(sq)
-                    ans = get_groq_response(sq, lang, context=offline_ans) if st.session_state.online_mode else f"[{t('offline_mode')}]\n\n{offline_ans}"
+                ans = stream_chat_answer(chat_container, sq, offline_ans) if st.session_state.online_mode else f"[{t('offline_mode')}]\n\n{offline_ans}"
                 st.session_state.chat_history.append({"role": "assistant", "content": ans})
                 log_query(st.session_state.farmer_name, st.session_state.farmer_location, sq, "chatbot")
                 mp3, _ = speak(ans, lang)
@@ -302,7 +322,7 @@ elif active == "chatbot":
         st.session_state.chat_history.append({"role": "user", "content": user_input})
         with st.spinner(t("thinking")):
             offline_ans = search_offline(user_input)
-            ans = get_groq_response(user_input, lang, context=offline_ans) if st.session_state.online_mode else f"[{t('offline_mode')}]\n\n{offline_ans}"
+        ans = stream_chat_answer(chat_container, user_input, offline_ans) if st.session_state.online_mode else f"[{t('offline_mode')}]\n\n{offline_ans}"
         st.session_state.chat_history.append({"role": "assistant", "content": ans})
         log_query(st.session_state.farmer_name, st.session_state.farmer_location, user_input, "chatbot")
         with st.spinner("🔊 Generating voice answer..."):
@@ -348,11 +368,11 @@ elif active == "disease":
                     5. **When to consult expert** - Severity assessment
                     
                     Also reference this offline data if relevant: {offline_ans[:500]}"""
-                    result = get_groq_response(prompt, lang)
+                    result = stream_groq_response(prompt, lang)   # lazy; show_result streams it
                 else:
                     result = offline_ans
             
-            st.markdown(f'<div class="result-box">{result}</div>', unsafe_allow_html=True)
+            show_result(result)
             log_query(st.session_state.farmer_name, st.session_state.farmer_location, query, "disease")
         else:
             st.warning(t("please_describe"))
@@ -392,10 +412,10 @@ elif active == "pest":
                     6. **Cost Estimate** - Approximate cost per acre
                     
                     Offline reference data: {offline_ans[:500]}"""
-                    result = get_groq_response(prompt, lang)
+                    result = stream_groq_response(prompt, lang)   # lazy; show_result streams it
                 else:
                     result = offline_ans
-            st.markdown(f'<div class="result-box">{result}</div>', unsafe_allow_html=True)
+            show_result(result)
             log_query(st.session_state.farmer_name, st.session_state.farmer_location, query, "pest")
 
 # ─────────────────────────── FERTILIZER PAGE ─────────────────────────────────
@@ -445,10 +465,10 @@ elif active == "fertilizer":
                 7. **Precautions** - Do's and Don'ts
                 
                 Reference: {offline_ans[:400]}"""
-                result = get_groq_response(prompt, lang)
+                result = stream_groq_response(prompt, lang)   # lazy; show_result streams it
             else:
                 result = offline_ans
-        st.markdown(f'<div class="result-box">{result}</div>', unsafe_allow_html=True)
+        show_result(result)
         log_query(st.session_state.farmer_name, st.session_state.farmer_location, query, "fertilizer")
 
 # ─────────────────────────── SCHEMES PAGE ────────────────────────────────────
@@ -730,9 +750,10 @@ elif active == "dashboard":
         fert_q = sum(1 for l in logs if l.get("type") == "fertilizer")
         st.metric("🧪 " + t("fertilizer_queries"), fert_q)
 
+    import pandas as pd   # already in sys.modules once the warm-up has run
+
     st.markdown(f"### 📋 {t('recent_queries')}")
     if logs:
-        import pandas as pd
         df = pd.DataFrame(logs[-20:])
         st.dataframe(df, use_container_width=True)
     else:
@@ -741,7 +762,6 @@ elif active == "dashboard":
     # Query type distribution
     if logs:
         st.markdown(f"### 📊 {t('query_distribution')}")
-        import pandas as pd
         type_counts = {}
         for l in logs:
             qtype = l.get("type", "other")
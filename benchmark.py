@@ -0,0 +1,228 @@
+import argparse
+import json
+import random
+import time
+import tracemalloc
+from collections import defaultdict
+
+import numpy as np
+
+from utils.corpus import doc_key, load_kcc_pairs, normalize_text
+from utils.embedding_stream import MODEL_NAME
+from utils.offline_search import fuse
+from utils.script_tokenizer import tokenize
+from utils.text_index import InvertedIndex
+
+KS = (1, 5, 10)
+RESULTS_PATH = "benchmark_results.json"
+VECTOR_TYPES = ("flat", "ivf-flat", "hnsw")
+
+
+def traced_bytes(build):
+    """Python heap retained by the object build() returns (tracemalloc; not FAISS's C++ memory)."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        obj = build()
+        retained = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    del obj
+    return retained
+
+
+def load_docs():
+    """Distinct KCC (question, answer) rows as {"q", "a"} dicts."""
+    docs, seen = [], set()
+    for question, answer in load_kcc_pairs():
+        key = doc_key(question, answer)
+        if question and answer and key not in seen:
+            seen.add(key)
+            docs.append({"q": question, "a": answer})
+    return docs
+
+
+def build_query_set(docs, n_queries, seed):
+    """
+    Held-out paraphrase queries.
+
+    Rows that share an answer but ask it with different question text are
+    paraphrases. For a sample of such answers one question is held out as
+    the query: every row with that question text is removed from the
+    searchable docs, and the remaining rows with the same answer are the
+    relevant (exact-answer) ids.
+
+    Returns:
+        (searchable_docs, queries) - queries are {"query", "relevant"} with
+        ids into searchable_docs
+    """
+    groups = defaultdict(list)
+    for i, doc in enumerate(docs):
+        groups[normalize_text(doc["a"])].append(i)
+    candidates = [rows for rows in groups.values()
+                  if len({normalize_text(docs[i]["q"]) for i in rows}) > 1]
+    rng = random.Random(seed)
+    rng.shuffle(candidates)
+
+    held_out, labels = set(), []
+    for rows in candidates[:n_queries]:
+        query = docs[rng.choice(rows)]["q"]
+        dropped = {i for i in rows if normalize_text(docs[i]["q"]) == normalize_text(query)}
+        held_out |= dropped
+        labels.append((query, [i for i in rows if i not in dropped]))
+
+    new_id = {}
+    searchable = []
+    for i, doc in enumerate(docs):
+        if i not in held_out:
+            new_id[i] = len(searchable)
+            searchable.append(doc)
+    queries = [{"query": q, "relevant": [new_id[i] for i in rel]} for q, rel in labels]
+    return searchable, queries
+
+
+class KeywordRetriever:
+    """Keyword overlap scoring as the original search_offline did it: substring hits, 3x in the question."""
+
+    name = "keyword"
+
+    def __init__(self, docs):
+        start = time.perf_counter()
+        self.docs = [(d["q"].lower(), d["a"].lower()) for d in docs]
+        self.build_seconds = time.perf_counter() - start
+        self.memory_bytes = traced_bytes(lambda: [(d["q"].lower(), d["a"].lower()) for d in docs])
+
+    def search(self, query, k):
+        keywords = tokenize(query)
+        scores = []
+        for i, (q, a) in enumerate(self.docs):
+            score = sum(3 * (kw in q) + (kw in a) for kw in keywords)
+            if score:
+                scores.append((score, i))
+        scores.sort(key=lambda item: (-item[0], item[1]))
+        return [(i, float(score)) for score, i in scores[:k]]
+
+
+class BM25Retriever:
+    name = "bm25"
+
+    def __init__(self, docs):
+        start = time.perf_counter()
+        self.index = InvertedIndex(docs)
+        self.build_seconds = time.perf_counter() - start
+        # Second, traced build: tracing would inflate build_seconds, and the
+        # arrays alone miss the vocabulary dict and any pending postings
+        self.memory_bytes = traced_bytes(lambda: InvertedIndex(docs))
+
+    def search(self, query, k):
+        return self.index.search(tokenize(query), k)
+
+
+class VectorRetriever:
+    """FAISS index over MiniLM question embeddings; queries are encoded per call."""
+
+    def __init__(self, index_type, doc_vectors, model):
+        from utils.vector_index import build_index, index_size_bytes
+        self.name = index_type
+        self.model = model
+        start = time.perf_counter()
+        self.index, _params = build_index(doc_vectors, index_type)
+        self.build_seconds = time.perf_counter() - start
+        self.memory_bytes = index_size_bytes(self.index)
+
+    def search(self, query, k):
+        vec = np.asarray(self.model.encode([query]), dtype=np.float32)
+        dist, ids = self.index.search(vec, k)
+        return [(int(i), 1.0 - float(d) / 2.0) for d, i in zip(dist[0], ids[0]) if i >= 0]
+
+
+class HybridRetriever:
+    """BM25 + vector search (flat when benchmarked) fused the way search_offline does."""
+
+    def __init__(self, lexical, semantic):
+        self.lexical, self.semantic = lexical, semantic
+        self.name = "hybrid" if semantic.name == "flat" else f"hybrid-{semantic.name}"
+        self.build_seconds = lexical.build_seconds + semantic.build_seconds
+        self.memory_bytes = lexical.memory_bytes + semantic.memory_bytes
+
+    def search(self, query, k):
+        return fuse({"lexical": self.lexical.search(query, max(k, 20)),
+                     "semantic": self.semantic.search(query, max(k, 20))})[:k]
+
+
+def evaluate(retriever, queries):
+    """Recall@k, MRR@10 and per-query latency percentiles for one retriever."""
+    hits = {k: 0 for k in KS}
+    reciprocal_ranks, timings = [], []
+    for item in queries:
+        start = time.perf_counter()
+        found = [doc_id for doc_id, _score in retriever.search(item["query"], max(KS))]
+        timings.append((time.perf_counter() - start) * 1000)
+        relevant = set(item["relevant"])
+        rank = next((r for r, doc_id in enumerate(found, 1) if doc_id in relevant), None)
+        for k in KS:
+            hits[k] += rank is not None and rank <= k
+        reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+
+    n = max(len(queries), 1)
+    result = {f"recall@{k}": round(hits[k] / n, 4) for k in KS}
+    result["mrr@10"] = round(float(np.mean(reciprocal_ranks)) if reciprocal_ranks else 0.0, 4)
+    for p in (50, 95, 99):
+        result[f"p{p}_ms"] = round(float(np.percentile(timings, p)), 3) if timings else 0.0
+    result["build_seconds"] = round(retriever.build_seconds, 3)
+    result["memory_bytes"] = int(retriever.memory_bytes)
+    return result
+
+
+def vector_retrievers(docs, index_types):
+    """Vector retrievers, or [] when faiss / sentence-transformers are not installed."""
+    try:
+        from sentence_transformers import SentenceTransformer
+        from utils.embedding_cache import EmbeddingCache, encode_with_cache
+    except ImportError as e:
+        print(f"Skipping vector retrievers: {e}")
+        return []
+    model = SentenceTransformer(MODEL_NAME)
+    cache = EmbeddingCache(MODEL_NAME)
+    doc_vectors, _stats = encode_with_cache(model, [d["q"] for d in docs], cache)
+    cache.close()
+    return [VectorRetriever(t, doc_vectors, model) for t in index_types]
+
+
+parser = argparse.ArgumentParser(description="Recall and latency benchmark for offline retrieval")
+parser.add_argument("--queries", type=int, default=500, help="Held-out paraphrase queries")
+parser.add_argument("--seed", type=int, default=0)
+parser.add_argument("--index-types", nargs="+", default=list(VECTOR_TYPES),
+                    help="FAISS index types to benchmark")
+parser.add_argument("--out", default=RESULTS_PATH, help="JSON results file")
+args = parser.parse_args()
+
+print("Building labeled query set...")
+docs, queries = build_query_set(load_docs(), args.queries, args.seed)
+print(f"{len(queries)} queries against {len(docs)} documents")
+
+bm25 = BM25Retriever(docs)
+retrievers = [KeywordRetriever(docs), bm25]
+vectors = vector_retrievers(docs, args.index_types)
+retrievers += vectors
+if vectors:
+    semantic = next((v for v in vectors if v.name == "flat"), vectors[0])
+    retrievers.append(HybridRetriever(bm25, semantic))
+
+results = {}
+for retriever in retrievers:
+    print(f"Evaluating {retriever.name}...")
+    results[retriever.name] = evaluate(retriever, queries)
+
+print(f"\n{'retriever':<16} {'R@1':>6} {'R@5':>6} {'R@10':>6} {'MRR':>6} "
+      f"{'p50ms':>8} {'p95ms':>8} {'p99ms':>8} {'build s':>8} {'MB':>8}")
+for name, r in results.items():
+    print(f"{name:<16} {r['recall@1']:>6.3f} {r['recall@5']:>6.3f} {r['recall@10']:>6.3f} "
+          f"{r['mrr@10']:>6.3f} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} "
+          f"{r['build_seconds']:>8.2f} {r['memory_bytes'] / 1e6:>8.2f}")
+
+with open(args.out, 'w', encoding='utf-8') as f:
+    json.dump({"created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+               "queries": len(queries), "documents": len(docs),
+               "seed": args.seed, "retrievers": results}, f, indent=2)
+print(f"\nResults written to {args.out}")
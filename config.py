@@ -0,0 +1,78 @@
+"""
+Central configuration for Kisan Sahayak
+Parses .env once and re-reads it only when the file's mtime changes, so
+API keys can be rotated without a restart and without reading the file on
+every request. Config.reload() forces an immediate re-read.
+
+Lookup order: .env, then the process environment (e.g. Streamlit Cloud
+secrets), then the caller's default.
+"""
+
+import os
+import threading
+import time
+
+from dotenv import dotenv_values, find_dotenv
+
+CHECK_INTERVAL = 1.0   # seconds between mtime checks; a stat() is cheap but not free
+
+
+class Config:
+    """Thread-safe view of .env + os.environ."""
+
+    def __init__(self, path: str = None):
+        self.path = path or find_dotenv(usecwd=True) or ".env"
+        self._values = {}
+        self._mtime = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self.reload()
+
+    def _stat(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def reload(self):
+        """Re-parse .env now, whether or not it changed."""
+        with self._lock:
+            mtime = self._stat()
+            values = dotenv_values(self.path) if mtime is not None else {}
+            self._values = {k: v for k, v in values.items() if v is not None}
+            self._mtime = mtime
+            self._checked = time.monotonic()
+
+    def _refresh(self):
+        now = time.monotonic()
+        if now - self._checked < CHECK_INTERVAL:
+            return
+        self._checked = now
+        if self._stat() != self._mtime:
+            self.reload()
+
+    def get(self, key: str, default: str = "") -> str:
+        self._refresh()
+        value = self._values.get(key)
+        if value is None:
+            value = os.environ.get(key, default)
+        return value.strip() if isinstance(value, str) else value
+
+
+_CONFIG = None
+_CONFIG_LOCK = threading.Lock()
+
+
+def get_config() -> Config:
+    """Process-wide Config singleton."""
+    global _CONFIG
+    with _CONFIG_LOCK:
+        if _CONFIG is None:
+            _CONFIG = Config()
+        return _CONFIG
+
+
+def get(key: str, default: str = "") -> str:
+    """Value of a setting (see module docstring for the lookup order)."""
+    return get_config().get(key, default)
+
@@ -0,0 +1,150 @@
+"""
+Unified offline corpus for Kisan Sahayak
+Merges the built-in OFFLINE_KB, knowledge_base/agricultural_kb.json and the
+KCC dataset into one deduplicated, id-addressable store
+"""
+
+import csv
+import hashlib
+import json
+import os
+import re
+
+KB_PATH = "knowledge_base/agricultural_kb.json"
+KCC_JSON_PATH = "kcc_qa_pairs.json"
+KCC_CSV_PATH = "clean_kcc.csv"
+KCC_PARQUET_PATH = "kcc_qa_pairs.parquet"
+
+# Source tags
+SOURCE_BUILTIN = "builtin"
+SOURCE_KB = "kb"
+SOURCE_KCC = "kcc"
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase and collapse whitespace so trivially different copies compare equal."""
+    return _WHITESPACE.sub(" ", str(text or "")).strip().lower()
+
+
+def doc_key(question: str, answer: str) -> str:
+    """Stable content key of a Q&A pair, used for deduplication."""
+    raw = normalize_text(question) + "\x1f" + normalize_text(answer)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+class Corpus:
+    """
+    In-memory Q&A store addressed by integer doc id.
+
+    Each doc is a dict with "id", "q", "a", "source", "category" and "key".
+    Adding a pair whose normalised text is already present returns the
+    existing id instead of storing a second copy.
+    """
+
+    def __init__(self):
+        self.docs = []
+        self._by_key = {}
+
+    def __len__(self):
+        return len(self.docs)
+
+    def __getitem__(self, doc_id: int) -> dict:
+        return self.docs[doc_id]
+
+    def add(self, question: str, answer: str, source: str, category: str = "general") -> int:
+        """Add a Q&A pair and return its doc id (existing id if it is a duplicate)."""
+        key = doc_key(question, answer)
+        if key in self._by_key:
+            return self._by_key[key]
+
+        doc_id = len(self.docs)
+        self.docs.append({
+            "id": doc_id,
+            "q": str(question or "").strip(),
+            "a": str(answer or "").strip(),
+            "source": source,
+            "category": category,
+            "key": key,
+        })
+        self._by_key[key] = doc_id
+        return doc_id
+
+    def get_by_key(self, key: str):
+        """Return the doc with this content key, or None."""
+        doc_id = self._by_key.get(key)
+        return None if doc_id is None else self.docs[doc_id]
+
+    def count_by_source(self) -> dict:
+        counts = {}
+        for doc in self.docs:
+            counts[doc["source"]] = counts.get(doc["source"], 0) + 1
+        return counts
+
+
+def load_kcc_pairs(json_path: str = KCC_JSON_PATH, csv_path: str = KCC_CSV_PATH,
+                   parquet_path: str = KCC_PARQUET_PATH):
+    """
+    Yield (question, answer) rows of the cleaned KCC dataset, in CSV row order.
+
+    Prefers the Parquet export (when pyarrow is installed), then the JSON
+    export, then the CSV; yields nothing if none of them exists.
+    """
+    if os.path.exists(parquet_path):
+        try:
+            from utils.kcc_store import iter_pairs
+        except ImportError:
+            pass
+        else:
+            yield from iter_pairs(parquet_path)
+            return
+    if os.path.exists(json_path):
+        with open(json_path, 'r', encoding='utf-8') as f:
+            for row in json.load(f):
+                yield row.get("question", ""), row.get("answer", "")
+    elif os.path.exists(csv_path):
+        with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                yield row.get("question", ""), row.get("answer", "")
+
+
+def load_kb_entries(kb_path: str = KB_PATH) -> list:
+    """Read the user-extensible knowledge base JSON (empty list if missing)."""
+    if not os.path.exists(kb_path):
+        return []
+    try:
+        with open(kb_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Error reading KB: {e}")
+        return []
+
+
+def build_corpus(builtin_entries, kb_path: str = KB_PATH,
+                 kcc_json_path: str = KCC_JSON_PATH, kcc_csv_path: str = KCC_CSV_PATH) -> Corpus:
+    """
+    Merge all offline sources into one Corpus.
+
+    Args:
+        builtin_entries: OFFLINE_KB-style list of {"q", "a"} dicts
+        kb_path: agricultural_kb.json path
+        kcc_json_path / kcc_csv_path: cleaned KCC dataset
+
+    Returns:
+        Corpus with curated entries first (builtin, then KB), then KCC rows
+    """
+    corpus = Corpus()
+
+    for entry in builtin_entries:
+        corpus.add(entry["q"], entry["a"], SOURCE_BUILTIN)
+
+    for item in load_kb_entries(kb_path):
+        if item.get("question") and item.get("answer"):
+            corpus.add(item["question"], item["answer"], SOURCE_KB, item.get("category", "general"))
+
+    for question, answer in load_kcc_pairs(kcc_json_path, kcc_csv_path):
+        if question and answer:
+            corpus.add(question, answer, SOURCE_KCC)
+
+    return corpus
@@ -1,26 +1,44 @@
-import faiss
-import pandas as pd
-import numpy as np
+import argparse
+import time
+
 from sentence_transformers import SentenceTransformer
 
+from utils.embedding_cache import EmbeddingCache, print_cache_stats
+from utils.embedding_stream import EMBEDDINGS_PATH, MODEL_NAME, add_stream_args, stream_encode
+from utils.live_index import publish_index
+from utils.vector_index import (INDEX_PATH, add_index_args, add_report_args, build_index,
+                                params_from_args, write_report)
+
+parser = argparse.ArgumentParser(description="Build the FAISS index for KCC questions")
+add_index_args(parser)
+add_report_args(parser)
+add_stream_args(parser)
+args = parser.parse_args()
+
 print("Loading model...")
 model = SentenceTransformer(
-    "all-MiniLM-L6-v2",
+    MODEL_NAME,
     local_files_only=False   # Allow download if needed
 )
 
-print("Loading cleaned CSV...")
-df = pd.read_csv("clean_kcc.csv")
-
-print("Creating embeddings...")
-embeddings = model.encode(df["question"].tolist())
+print("Creating embeddings (streaming clean_kcc.csv)...")
+cache = None if args.no_cache else EmbeddingCache(MODEL_NAME)
+embeddings, stream_stats = stream_encode(model, "clean_kcc.csv", EMBEDDINGS_PATH,
+                                         batch_size=args.batch_size, chunk_size=args.chunk_size,
+                                         workers=args.workers, cache=cache)
+if cache is not None:
+    cache.close()
+    print_cache_stats(stream_stats)
 
-dimension = embeddings.shape[1]
+print(f"Building FAISS index ({args.index_type})...")
+start = time.perf_counter()
+index, params = build_index(embeddings, args.index_type, **params_from_args(args))
+build_seconds = time.perf_counter() - start
 
-print("Building FAISS index...")
-index = faiss.IndexFlatL2(dimension)
-index.add(np.array(embeddings))
+publish_index(index, params, INDEX_PATH, encoder=model)
 
-faiss.write_index(index, "kcc_index.faiss")
+if args.report_queries:
+    print("Measuring recall and latency against flat search...")
+    write_report(index, params, embeddings, args.report_k, args.report_queries, build_seconds)
 
-print("✅ FAISS index created successfully!")
\ No newline at end of file
+print("✅ FAISS index created successfully!")
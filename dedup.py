@@ -0,0 +1,97 @@
+"""
+Near-duplicate detection for Kisan Sahayak
+MinHash signatures over character shingles, bucketed with locality-sensitive
+hashing, so KCC rows that differ only in whitespace, punctuation or a
+district name collapse into one cluster in roughly linear time
+"""
+
+import numpy as np
+
+from utils.corpus import normalize_text
+
+SHINGLE_SIZE = 5      # characters per shingle
+NUM_PERM = 64         # MinHash permutations per signature
+BANDS = 16            # LSH bands of NUM_PERM // BANDS rows each
+THRESHOLD = 0.85      # estimated Jaccard similarity (per field) to count as a duplicate
+
+
+def shingle_hashes(text: str, size: int = SHINGLE_SIZE) -> np.ndarray:
+    """Distinct 32-bit hashes of the text's overlapping character shingles."""
+    codes = np.frombuffer(normalize_text(text).encode("utf-32-le"), dtype=np.uint32)
+    if len(codes) < size:
+        codes = np.pad(codes, (0, size - len(codes)))
+    windows = np.lib.stride_tricks.sliding_window_view(codes.astype(np.uint64), size)
+    # Polynomial rolling hash; uint64 arithmetic wraps, which is what we want
+    powers = np.uint64(1000003) ** np.arange(size, dtype=np.uint64)
+    return np.unique((windows * powers).sum(axis=1) & np.uint64(0xFFFFFFFF))
+
+
+class NearDuplicateIndex:
+    """
+    Online MinHash/LSH index of canonical records.
+
+    A record is one or more text fields (e.g. question and answer). It is a
+    near duplicate of a canonical only if *every* field is similar on its
+    own, so a shared boilerplate answer cannot merge questions about
+    different crops. add() returns the canonical a new record duplicates,
+    or registers it as a new canonical. Only canonicals are stored (one
+    signature per field plus their LSH bucket entries), so memory grows
+    with the number of clusters, not the number of input rows.
+    """
+
+    def __init__(self, threshold: float = THRESHOLD, num_perm: int = NUM_PERM,
+                 bands: int = BANDS, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = np.random.default_rng(seed)
+        # Multiply-shift hashing: odd 64-bit multipliers, keep the high 32 bits
+        self._a = rng.integers(0, 2 ** 63, num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, num_perm, dtype=np.uint64)
+        self.signatures = []
+        self._buckets = {}
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = shingle_hashes(text)
+        permuted = (self._a[:, None] * hashes[None, :] + self._b[:, None]) >> np.uint64(32)
+        return permuted.min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, field: int, sig: np.ndarray) -> list:
+        return [(field, band, sig[band * self.rows:(band + 1) * self.rows].tobytes())
+                for band in range(self.bands)]
+
+    def add(self, *fields: str):
+        """
+        Returns:
+            (canonical_id, is_new) - is_new is False when the record is a
+            near duplicate of canonical_id
+        """
+        sigs = [self.signature(text) for text in fields]
+        keys = [self._band_keys(field, sig) for field, sig in enumerate(sigs)]
+
+        # Candidates must collide in some band of every field
+        candidates = None
+        for field_keys in keys:
+            found = set()
+            for key in field_keys:
+                found.update(self._buckets.get(key, ()))
+            candidates = found if candidates is None else candidates & found
+            if not candidates:
+                break
+
+        for candidate in sorted(candidates or ()):
+            if all(np.mean(stored == sig) >= self.threshold
+                   for stored, sig in zip(self.signatures[candidate], sigs)):
+                return candidate, False
+
+        canonical_id = len(self.signatures)
+        self.signatures.append(sigs)
+        for field_keys in keys:
+            for key in field_keys:
+                self._buckets.setdefault(key, []).append(canonical_id)
+        return canonical_id, True
@@ -1,28 +1,42 @@
+import argparse
+import time
 from sentence_transformers import SentenceTransformer
-import pandas as pd
-import pickle
-import faiss
-import numpy as np
 
-print("Loading model...")
-model = SentenceTransformer("all-MiniLM-L6-v2")
-
-print("Loading cleaned CSV...")
-df = pd.read_csv("clean_kcc.csv")
-
-questions = df["question"].tolist()
-
-print("Generating embeddings...")
-embeddings = model.encode(questions)
+from utils.embedding_cache import EmbeddingCache, print_cache_stats
+from utils.embedding_stream import EMBEDDINGS_PATH, MODEL_NAME, add_stream_args, stream_encode
+from utils.live_index import publish_index
+from utils.vector_index import (COMPRESSED_TYPES, INDEX_PATH, add_index_args, add_report_args,
+                                build_index, params_from_args, write_report)
 
-with open("embeddings.pkl", "wb") as f:
-    pickle.dump(embeddings, f)
+parser = argparse.ArgumentParser(description="Embed KCC questions and build the FAISS index")
+add_index_args(parser)
+add_report_args(parser)
+add_stream_args(parser)
+args = parser.parse_args()
 
-print("Creating FAISS index...")
-dimension = embeddings.shape[1]
-index = faiss.IndexFlatL2(dimension)
-index.add(np.array(embeddings))
-
-faiss.write_index(index, "kcc_index.faiss")
-
-print("Embeddings and FAISS index created successfully!")
\ No newline at end of file
+print("Loading model...")
+model = SentenceTransformer(MODEL_NAME)
+
+print("Generating embeddings (streaming clean_kcc.csv)...")
+cache = None if args.no_cache else EmbeddingCache(MODEL_NAME)
+embeddings, stream_stats = stream_encode(model, "clean_kcc.csv", EMBEDDINGS_PATH,
+                                         batch_size=args.batch_size, chunk_size=args.chunk_size,
+                                         workers=args.workers, cache=cache)
+if cache is not None:
+    cache.close()
+    print_cache_stats(stream_stats)
+print(f"Wrote {stream_stats['rows']} vectors to {EMBEDDINGS_PATH} "
+      f"({stream_stats['rows_per_sec']} rows/sec)")
+
+print(f"Creating FAISS index ({args.index_type})...")
+start = time.perf_counter()
+index, params = build_index(embeddings, args.index_type, **params_from_args(args))
+build_seconds = time.perf_counter() - start
+
+publish_index(index, params, INDEX_PATH, encoder=model)
+
+if args.index_type in COMPRESSED_TYPES and args.report_queries:
+    print("Measuring memory saved and recall lost against the float index...")
+    write_report(index, params, embeddings, args.report_k, args.report_queries, build_seconds)
+
+print("Embeddings and FAISS index created successfully!")
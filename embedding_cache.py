@@ -0,0 +1,132 @@
+"""
+Content-addressed embedding cache for Kisan Sahayak
+Rebuilds only encode questions whose normalised text (or the model) changed
+"""
+
+import hashlib
+import os
+import sqlite3
+import time
+
+import numpy as np
+
+from utils.corpus import normalize_text
+
+CACHE_PATH = "embedding_cache.sqlite"
+
+
+class EmbeddingCache:
+    """
+    SQLite store of text -> float32 vector, keyed by
+    sha256(model name + normalised text).
+
+    all-MiniLM-L6-v2 is uncased and whitespace-insensitive, so texts that
+    only differ in case or spacing share one cached vector.
+    """
+
+    def __init__(self, model_name: str, path: str = CACHE_PATH):
+        self.model_name = model_name
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vec BLOB)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value REAL)")
+        self.conn.commit()
+
+    def key(self, text: str) -> str:
+        raw = self.model_name + "\x00" + normalize_text(text)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get_many(self, keys) -> dict:
+        """Return {key: vector} for the keys that are cached."""
+        found = {}
+        keys = list(keys)
+        for start in range(0, len(keys), 900):   # SQLite parameter limit
+            chunk = keys[start:start + 900]
+            marks = ",".join("?" * len(chunk))
+            rows = self.conn.execute(f"SELECT key, vec FROM embeddings WHERE key IN ({marks})", chunk)
+            for key, blob in rows:
+                found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, items):
+        """Store (key, vector) pairs."""
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (key, vec) VALUES (?, ?)",
+            ((key, np.asarray(vec, dtype=np.float32).tobytes()) for key, vec in items))
+        self.conn.commit()
+
+    def seconds_per_row(self):
+        row = self.conn.execute("SELECT value FROM meta WHERE name = 'seconds_per_row'").fetchone()
+        return row[0] if row else None
+
+    def set_seconds_per_row(self, value: float):
+        self.conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('seconds_per_row', ?)",
+                          (value,))
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+def encode_with_cache(model, texts, cache: EmbeddingCache, batch_size: int = 64, seen: set = None):
+    """
+    Encode texts, reusing cached vectors and encoding only new/changed ones.
+
+    Args:
+        model: SentenceTransformer (or anything with .encode(list, batch_size=))
+        texts: List of strings, in output row order
+        cache: EmbeddingCache for the same model
+        seen: Keys encoded earlier in the same run (updated in place); rows
+              repeating them count as duplicates, not cache hits
+
+    Returns:
+        (embeddings, stats) - (len(texts), dim) float32 matrix and a dict with
+        rows, hits, misses, duplicates, hit_rate, encode_seconds and
+        seconds_saved. Only rows cached before this run count as hits;
+        repeats of a text encoded in this run are duplicates.
+    """
+    seen = set() if seen is None else seen
+    keys = [cache.key(t) for t in texts]
+    cached = cache.get_many(set(keys))
+
+    # Encode each missing text once, even if it repeats in the input
+    missing = {}
+    for key, text in zip(keys, texts):
+        if key not in cached and key not in missing:
+            missing[key] = text
+
+    hits = sum(1 for key in keys if key in cached and key not in seen)
+    encode_seconds = 0.0
+    if missing:
+        start = time.perf_counter()
+        vectors = model.encode(list(missing.values()), batch_size=batch_size)
+        encode_seconds = time.perf_counter() - start
+        new = dict(zip(missing.keys(), np.asarray(vectors, dtype=np.float32)))
+        cache.put_many(new.items())
+        cache.set_seconds_per_row(encode_seconds / len(missing))
+        cached.update(new)
+        seen.update(new)
+
+    per_row = cache.seconds_per_row() or 0.0
+    stats = {
+        "rows": len(texts),
+        "hits": hits,
+        "misses": len(missing),
+        "duplicates": len(texts) - hits - len(missing),
+        "hit_rate": round(hits / len(texts), 4) if texts else 0.0,
+        "encode_seconds": round(encode_seconds, 2),
+        "seconds_saved": round(hits * per_row, 2),
+    }
+
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32), stats
+    return np.vstack([cached[key] for key in keys]), stats
+
+
+def print_cache_stats(stats: dict):
+    print(f"Embedding cache: {stats['hits']}/{stats['rows']} hits ({stats['hit_rate']:.1%}), "
+          f"encoded {stats['misses']} rows in {stats['encode_seconds']}s "
+          f"({stats['duplicates']} repeats), "
+          f"saved ~{stats['seconds_saved']}s")
@@ -0,0 +1,158 @@
+"""
+Streaming embedding generation and storage for Kisan Sahayak
+Reads the corpus in chunks, encodes in batches (optionally on several CPU
+worker processes) and writes vectors straight into a preallocated
+memory-mapped .npy file, so peak memory stays flat for any corpus size.
+
+The .npy is opened read-only with mmap_mode='r' by every consumer, so
+several processes share one page-cached copy. A JSON sidecar records the
+model, dimension, row count and the row -> document key mapping.
+"""
+
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.corpus import doc_key
+from utils.embedding_cache import encode_with_cache
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+EMBEDDINGS_PATH = "embeddings.npy"
+CHUNK_SIZE = 10000
+BATCH_SIZE = 64
+
+
+def add_stream_args(parser):
+    """Register the streaming encoder options on an argparse parser."""
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                        help="Texts per model forward pass")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                        help="CSV rows read and encoded per chunk")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="CPU worker processes for encoding (0 = in-process)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Encode every row, bypassing the embedding cache")
+    return parser
+
+
+def meta_path(embeddings_path: str) -> str:
+    return os.path.splitext(embeddings_path)[0] + ".json"
+
+
+def iter_qa_chunks(csv_path: str, chunk_size: int = CHUNK_SIZE):
+    """Yield (questions, answers) lists from the cleaned CSV, chunk_size rows at a time."""
+    for chunk in pd.read_csv(csv_path, usecols=["question", "answer"], chunksize=chunk_size):
+        yield (chunk["question"].fillna("").astype(str).tolist(),
+               chunk["answer"].fillna("").astype(str).tolist())
+
+
+def count_rows(csv_path: str, chunk_size: int = CHUNK_SIZE) -> int:
+    return sum(len(questions) for questions, _answers in iter_qa_chunks(csv_path, chunk_size))
+
+
+class _PoolEncoder:
+    """SentenceTransformer multi-process pool behind the plain .encode() interface."""
+
+    def __init__(self, model, workers: int):
+        self.model = model
+        self.pool = model.start_multi_process_pool(["cpu"] * workers)
+
+    def encode(self, texts, batch_size: int = BATCH_SIZE):
+        return self.model.encode_multi_process(texts, self.pool, batch_size=batch_size)
+
+    def close(self):
+        self.model.stop_multi_process_pool(self.pool)
+
+
+def stream_encode(model, csv_path: str, out_path: str = EMBEDDINGS_PATH,
+                  batch_size: int = BATCH_SIZE, chunk_size: int = CHUNK_SIZE,
+                  workers: int = 0, cache=None, model_name: str = MODEL_NAME):
+    """
+    Encode the CSV questions into a memory-mapped (rows, dim) float32 .npy file.
+
+    Args:
+        model: SentenceTransformer
+        csv_path: Input CSV with question/answer columns
+        out_path: Output .npy, preallocated to the final size
+        workers: >1 to encode with a multi-process pool
+        cache: Optional EmbeddingCache; only uncached texts are encoded
+        model_name: Recorded in the sidecar
+
+    Returns:
+        (vectors, stats) - read-only memmap of the output and a dict with
+        rows, rows_per_sec and (with a cache) hits / misses / duplicates / seconds_saved
+    """
+    start = time.perf_counter()
+    n_rows = count_rows(csv_path, chunk_size)
+    dim = model.get_sentence_embedding_dimension()
+    out = np.lib.format.open_memmap(out_path, mode="w+", dtype=np.float32, shape=(n_rows, dim))
+
+    encoder = _PoolEncoder(model, workers) if workers > 1 else model
+    stats = {"rows": n_rows, "hits": 0, "misses": 0, "duplicates": 0,
+             "encode_seconds": 0.0, "seconds_saved": 0.0}
+    seen = set()   # keys encoded in this run, so later chunks repeating them are not cache hits
+    row_keys = []
+    row = 0
+    try:
+        for texts, answers in iter_qa_chunks(csv_path, chunk_size):
+            row_keys.extend(doc_key(q, a) for q, a in zip(texts, answers))
+            if cache is not None:
+                vectors, chunk_stats = encode_with_cache(encoder, texts, cache, batch_size, seen)
+                for name in ("hits", "misses", "duplicates", "encode_seconds", "seconds_saved"):
+                    stats[name] += chunk_stats[name]
+            else:
+                vectors = encoder.encode(texts, batch_size=batch_size)
+            out[row:row + len(texts)] = vectors
+            row += len(texts)
+            out.flush()
+            print(f"  encoded {row}/{n_rows} rows")
+    finally:
+        if encoder is not model:
+            encoder.close()
+
+    del out
+    write_meta(out_path, model_name, dim, row_keys)
+    elapsed = time.perf_counter() - start
+    stats["hit_rate"] = round(stats["hits"] / n_rows, 4) if n_rows else 0.0
+    stats["encode_seconds"] = round(stats["encode_seconds"], 2)
+    stats["seconds_saved"] = round(stats["seconds_saved"], 2)
+    stats["rows_per_sec"] = round(n_rows / elapsed, 1) if elapsed else 0.0
+    return np.load(out_path, mmap_mode="r"), stats
+
+
+def write_meta(embeddings_path: str, model_name: str, dim: int, row_keys: list):
+    """Write the sidecar describing an embeddings file."""
+    meta = {
+        "model": model_name,
+        "dimension": int(dim),
+        "rows": len(row_keys),
+        "dtype": "float32",
+        "row_keys": row_keys,   # row i -> corpus doc key (see utils.corpus.doc_key)
+    }
+    with open(meta_path(embeddings_path), 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+
+
+def load_embeddings(embeddings_path: str = EMBEDDINGS_PATH, model_name: str = None):
+    """
+    Open an embeddings file zero-copy, read-only.
+
+    Args:
+        embeddings_path: .npy written by stream_encode
+        model_name: If given, fail when the file was built with another model
+
+    Returns:
+        (vectors, meta) - (rows, dim) float32 memmap and the sidecar dict
+    """
+    vectors = np.load(embeddings_path, mmap_mode="r")
+    with open(meta_path(embeddings_path), 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    if vectors.shape != (meta["rows"], meta["dimension"]):
+        raise ValueError(f"{embeddings_path} has shape {vectors.shape}, "
+                         f"sidecar says ({meta['rows']}, {meta['dimension']})")
+    if model_name and meta["model"] != model_name:
+        raise ValueError(f"{embeddings_path} was built with {meta['model']}, not {model_name}")
+    return vectors, meta
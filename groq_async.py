@@ -0,0 +1,159 @@
+"""
+Async Groq client for Kisan Sahayak
+Same payload, response cache, error messages and offline fallback as
+get_groq_response, over an httpx.AsyncClient, so batch jobs can keep many
+requests in flight and the UI can run independent calls concurrently.
+
+Pre-generate answers for logged farmer queries (fills the response cache):
+    python -m utils.groq_async --concurrency 8 [--language Hindi]
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from utils.groq_client import (GROQ_API_URL, MAX_RETRIES, MAX_RETRY_WAIT, POOL_SIZE,
+                               REQUEST_TIMEOUT, RETRY_STATUS,
+                               _api_key, _backoff, _cache_lookup, _connection_message,
+                               _headers, _http_error_message, _missing_key_message,
+                               _retry_after, _timeout_message, _unexpected_message,
+                               build_payload)
+
+DEFAULT_CONCURRENCY = POOL_SIZE
+
+
+def _error_message(e: Exception, context: str = "") -> str:
+    """httpx counterpart of groq_client._error_message."""
+    if isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout)):
+        return _connection_message(context)
+    if isinstance(e, httpx.TimeoutException):
+        return _timeout_message(context)
+    if isinstance(e, httpx.HTTPStatusError):
+        return _http_error_message(e.response.status_code, context)
+    return _unexpected_message(e, context)
+
+
+class AsyncGroqClient:
+    """
+    Pooled async client; use one per event loop:
+
+        async with AsyncGroqClient() as client:
+            answer = await client.get_response("Best time to sow wheat?", "Hindi")
+    """
+
+    def __init__(self, max_connections: int = POOL_SIZE, timeout: float = REQUEST_TIMEOUT):
+        self.client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def _post(self, headers: dict, payload: dict) -> httpx.Response:
+        """Async twin of groq_client._post: retries 429/5xx with backoff or Retry-After."""
+        for attempt in range(MAX_RETRIES + 1):
+            resp = await self.client.post(GROQ_API_URL, headers=headers, json=payload)
+            if resp.status_code not in RETRY_STATUS or attempt == MAX_RETRIES:
+                break
+            delay = _retry_after(resp)
+            delay = _backoff(attempt) if delay is None else delay
+            if delay > MAX_RETRY_WAIT:
+                break
+            await asyncio.sleep(delay)
+        resp.raise_for_status()
+        return resp
+
+    async def get_response(self, query: str, language: str = "English",
+                           context: str = "", system_override: str = "") -> str:
+        """Same contract as get_groq_response: always returns text, never raises."""
+        payload = build_payload(query, language, context, system_override)
+        cache, key, cached = _cache_lookup(payload, language)
+        if cached is not None:
+            return cached
+
+        api_key = _api_key()
+        if not api_key:
+            return _missing_key_message(context)
+
+        try:
+            resp = await self._post(_headers(api_key), payload)
+            answer = resp.json()["choices"][0]["message"]["content"]
+            if cache is not None and answer:
+                cache.set(key, answer)
+            return answer
+        except Exception as e:
+            return _error_message(e, context)
+
+
+async def gather_bounded(aws, limit: int = DEFAULT_CONCURRENCY) -> list:
+    """
+    asyncio.gather with at most `limit` awaitables running at once.
+    Results are returned in input order.
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(aw):
+        async with semaphore:
+            return await aw
+
+    return await asyncio.gather(*(run(aw) for aw in aws))
+
+
+async def get_groq_responses(jobs: list, concurrency: int = DEFAULT_CONCURRENCY) -> list:
+    """
+    Answer many questions concurrently.
+
+    Args:
+        jobs: dicts of get_groq_response keyword arguments
+              ({"query": ..., "language": ..., "context": ...})
+        concurrency: maximum requests in flight
+
+    Returns:
+        Answers in input order
+    """
+    async with AsyncGroqClient(max_connections=concurrency) as client:
+        return await gather_bounded((client.get_response(**r) for r in jobs), concurrency)
+
+
+def run_groq_responses(jobs: list, concurrency: int = DEFAULT_CONCURRENCY) -> list:
+    """Blocking wrapper around get_groq_responses for scripts and Streamlit pages."""
+    return asyncio.run(get_groq_responses(jobs, concurrency))
+
+
+def pregenerate(language: str = "English", concurrency: int = DEFAULT_CONCURRENCY,
+                limit: int = None) -> int:
+    """Answer every distinct logged chatbot query once, so the cache serves it next time."""
+    from utils.offline_search import search_offline
+    from utils.query_logger import get_logs
+
+    queries = []
+    for entry in get_logs():
+        if entry.get("type") == "chatbot" and entry.get("query") not in queries:
+            queries.append(entry["query"])
+    queries = queries[:limit] if limit else queries
+
+    start = time.perf_counter()
+    jobs = [{"query": q, "language": language, "context": search_offline(q)} for q in queries]
+    run_groq_responses(jobs, concurrency)
+    elapsed = time.perf_counter() - start
+    print(f"Answered {len(queries)} logged queries in {elapsed:.1f}s "
+          f"({concurrency} in flight)")
+    return len(queries)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-generate Groq answers for logged queries")
+    parser.add_argument("--language", default="English")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--limit", type=int, default=None)
+    args = parser.parse_args()
+    pregenerate(args.language, args.concurrency, args.limit)
@@ -1,15 +1,44 @@
 """
 Groq API Client for Kisan Sahayak - FIXED VERSION
-Reads key fresh on every call so .env changes take effect immediately
+Reads the key through utils.config, so .env changes take effect without a
+restart (the file is only re-parsed when it changes). Successful answers are
+cached on disk (utils.response_cache), so repeated prompts cost no API quota.
 """
 
-import os
+import json
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
 import requests
-from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+from utils import config
+from utils.response_cache import (CACHE_PATH, DEFAULT_MAX_ENTRIES, DEFAULT_TTL,
+                                  ResponseCache, cache_key)
 
 GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
 GROQ_MODEL   = "llama-3.3-70b-versatile"   # Best free Groq model
 
+# One keep-alive connection pool shared by every session/thread, so only the
+# first request pays the TCP + TLS handshake to api.groq.com
+POOL_SIZE       = int(config.get("GROQ_POOL_SIZE", "8"))
+REQUEST_TIMEOUT = 30
+MAX_RETRIES     = 3                          # for 429 / 5xx responses
+RETRY_STATUS    = {429, 500, 502, 503, 504}
+BACKOFF_BASE    = 0.5                        # seconds; doubled per attempt, full jitter
+BACKOFF_MAX     = 8.0
+MAX_RETRY_WAIT  = 20.0                       # give up instead of honouring a longer Retry-After
+
+MAX_TOKENS  = 1500
+TEMPERATURE = 0.4
+TOP_P       = 0.9
+CONTEXT_CHARS = 800                          # reference data sent along with the question
+
+# Response cache; GROQ_CACHE=0 disables it
+CACHE_ENV = "GROQ_CACHE"
+
 SYSTEM_PROMPT = """You are Kisan Sahayak, an expert AI agricultural assistant for Indian farmers.
 You have deep expertise in:
 - Indian crop cultivation and farming practices
@@ -30,75 +59,266 @@ Guidelines:
 """
 
 
-def get_groq_response(query: str, language: str = "English",
-                      context: str = "", system_override: str = "") -> str:
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
 
-    # Reload .env fresh every call — handles key added after app started
-    load_dotenv(override=True)
-    api_key = os.getenv("GROQ_API_KEY", "").strip()
 
-    # Validate key
-    if not api_key or api_key in ("your_groq_api_key_here", ""):
-        offline_note = f"\n\nOffline Answer:\n{context}" if context else ""
-        return (
-            "⚠️ **Groq API key not configured.**\n\n"
-            "Fix steps:\n"
-            "1. Go to https://console.groq.com → sign up free\n"
-            "2. Click API Keys → Create API Key → copy it\n"
-            "3. Open `.env` file in your project folder\n"
-            "4. Set: GROQ_API_KEY=paste_your_key_here\n"
-            "5. Save `.env` and restart: python -m streamlit run app.py"
-            + offline_note
-        )
+def get_session() -> requests.Session:
+    """Process-wide pooled session (urllib3's pool is thread-safe)."""
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            session = requests.Session()
+            # max_retries=1 re-opens a pooled connection the server closed while idle
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE,
+                                  pool_block=True, max_retries=1)
+            session.mount("https://", adapter)
+            _SESSION = session
+    return _SESSION
 
+
+_CACHE = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_response_cache():
+    """Process-wide ResponseCache, or None when caching is disabled."""
+    global _CACHE
+    if config.get(CACHE_ENV, "1") == "0":
+        return None
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = ResponseCache(config.get("GROQ_CACHE_PATH", CACHE_PATH),
+                                   ttl=float(config.get("GROQ_CACHE_TTL", str(DEFAULT_TTL))),
+                                   max_entries=int(config.get("GROQ_CACHE_SIZE", str(DEFAULT_MAX_ENTRIES))))
+    return _CACHE
+
+
+def cache_stats() -> dict:
+    """size / hits / misses / evictions / hit_rate of the response cache ({} if disabled)."""
+    cache = get_response_cache()
+    return cache.stats() if cache is not None else {}
+
+
+def _retry_after(resp) -> float:
+    """Seconds from a Retry-After header (delta-seconds or HTTP date), or None."""
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _backoff(attempt: int) -> float:
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+def _post(headers: dict, payload: dict, stream: bool = False) -> requests.Response:
+    """
+    POST to Groq over the pooled session, retrying 429/5xx with jittered
+    exponential backoff (or the server's Retry-After). Raises HTTPError
+    once retries are exhausted or the wait would exceed MAX_RETRY_WAIT.
+    With stream=True the body is left unread for the caller to iterate.
+    """
+    session = get_session()
+    for attempt in range(MAX_RETRIES + 1):
+        resp = session.post(GROQ_API_URL, headers=headers, json=payload,
+                            timeout=REQUEST_TIMEOUT, stream=stream)
+        if resp.status_code not in RETRY_STATUS or attempt == MAX_RETRIES:
+            break
+        delay = _retry_after(resp)
+        delay = _backoff(attempt) if delay is None else delay
+        if delay > MAX_RETRY_WAIT:
+            break
+        resp.close()
+        time.sleep(delay)
+    if stream and not resp.ok:
+        resp.close()   # hand the connection back to the pool; status_code is still readable
+    resp.raise_for_status()
+    return resp
+
+
+def build_payload(query: str, language: str = "English",
+                  context: str = "", system_override: str = "") -> dict:
+    """Chat-completions request body for a farmer's question."""
     lang_instruction = f"\n\nIMPORTANT: Respond ONLY in {language}. Do not use any other language."
     full_query = (
-        f"{query}\n\n[Reference data: {context[:800]}]{lang_instruction}"
+        f"{query}\n\n[Reference data: {context[:CONTEXT_CHARS]}]{lang_instruction}"
         if context else
         f"{query}{lang_instruction}"
     )
-
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-    }
-    payload = {
+    return {
         "model": GROQ_MODEL,
         "messages": [
             {"role": "system", "content": system_override or SYSTEM_PROMPT},
             {"role": "user",   "content": full_query},
         ],
-        "max_tokens": 1500,
-        "temperature": 0.4,
-        "top_p": 0.9,
+        "max_tokens": MAX_TOKENS,
+        "temperature": TEMPERATURE,
+        "top_p": TOP_P,
     }
 
+
+def payload_cache_key(payload: dict, language: str) -> str:
+    system, user = (m["content"] for m in payload["messages"])
+    params = {name: payload[name] for name in ("max_tokens", "temperature", "top_p")}
+    return cache_key(system, user, language, payload["model"], params)
+
+
+def _missing_key_message(context: str = "") -> str:
+    offline_note = f"\n\nOffline Answer:\n{context}" if context else ""
+    return (
+        "⚠️ **Groq API key not configured.**\n\n"
+        "Fix steps:\n"
+        "1. Go to https://console.groq.com → sign up free\n"
+        "2. Click API Keys → Create API Key → copy it\n"
+        "3. Open `.env` file in your project folder\n"
+        "4. Set: GROQ_API_KEY=paste_your_key_here\n"
+        "5. Save `.env` and restart: python -m streamlit run app.py"
+        + offline_note
+    )
+
+
+def _http_error_message(code: int, context: str = "") -> str:
+    if code == 401:
+        return (
+            "❌ **Invalid Groq API key.**\n\n"
+            "Your key was rejected. Please:\n"
+            "1. Go to https://console.groq.com → API Keys\n"
+            "2. Delete old key → Create new one → Copy it\n"
+            "3. Paste into `.env` file: GROQ_API_KEY=your_new_key\n"
+            "4. Save and restart the app"
+        )
+    elif code == 429:
+        return "⚠️ Rate limit. Wait 1 minute and try again.\n\n" + (context or "")
+    else:
+        return f"❌ API Error {code}.\n\n" + (context or "No data available.")
+
+
+def _connection_message(context: str = "") -> str:
+    return "🔴 No internet connection.\n\n" + (context or "No offline data for this query.")
+
+
+def _timeout_message(context: str = "") -> str:
+    return "⏱️ Request timed out. Please try again.\n\n" + (context or "")
+
+
+def _unexpected_message(e: Exception, context: str = "") -> str:
+    return f"❌ Error: {e}\n\nOffline Answer:\n{context or 'No data.'}"
+
+
+def _error_message(e: Exception, context: str = "") -> str:
+    """Farmer-facing message for a failed request, with the offline answer as fallback."""
+    if isinstance(e, requests.exceptions.ConnectionError):
+        return _connection_message(context)
+    if isinstance(e, requests.exceptions.Timeout):
+        return _timeout_message(context)
+    if isinstance(e, requests.exceptions.HTTPError):
+        return _http_error_message(e.response.status_code, context)
+    return _unexpected_message(e, context)
+
+
+def _api_key():
+    """Configured Groq key, or None when missing / still the placeholder."""
+    # Cached .env, re-parsed only when the file changes — handles key added after app started
+    api_key = config.get("GROQ_API_KEY")
+    if not api_key or api_key == "your_groq_api_key_here":
+        return None
+    return api_key
+
+
+def _headers(api_key: str) -> dict:
+    return {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
+    }
+
+
+def _cache_lookup(payload: dict, language: str):
+    """(cache, key, cached answer or None); cache is None when caching is disabled."""
+    cache = get_response_cache()
+    key = payload_cache_key(payload, language)
+    if cache is None:
+        return None, key, None
+    return cache, key, cache.get(key)
+
+
+def get_groq_response(query: str, language: str = "English",
+                      context: str = "", system_override: str = "") -> str:
+
+    payload = build_payload(query, language, context, system_override)
+    cache, key, cached = _cache_lookup(payload, language)
+    if cached is not None:
+        return cached
+
+    api_key = _api_key()
+    if not api_key:
+        return _missing_key_message(context)
+
     try:
-        resp = requests.post(GROQ_API_URL, headers=headers, json=payload, timeout=30)
-        resp.raise_for_status()
-        return resp.json()["choices"][0]["message"]["content"]
-
-    except requests.exceptions.ConnectionError:
-        return "🔴 No internet connection.\n\n" + (context or "No offline data for this query.")
-    except requests.exceptions.Timeout:
-        return "⏱️ Request timed out. Please try again.\n\n" + (context or "")
-    except requests.exceptions.HTTPError:
-        code = resp.status_code
-        if code == 401:
-            return (
-                "❌ **Invalid Groq API key.**\n\n"
-                "Your key was rejected. Please:\n"
-                "1. Go to https://console.groq.com → API Keys\n"
-                "2. Delete old key → Create new one → Copy it\n"
-                "3. Paste into `.env` file: GROQ_API_KEY=your_new_key\n"
-                "4. Save and restart the app"
-            )
-        elif code == 429:
-            return "⚠️ Rate limit. Wait 1 minute and try again.\n\n" + (context or "")
-        else:
-            return f"❌ API Error {code}.\n\n" + (context or "No data available.")
+        resp = _post(_headers(api_key), payload)
+        answer = resp.json()["choices"][0]["message"]["content"]
+        if cache is not None and answer:
+            cache.set(key, answer)   # only successful completions; errors are never cached
+        return answer
     except Exception as e:
-        return f"❌ Error: {e}\n\nOffline Answer:\n{context or 'No data.'}"
+        return _error_message(e, context)
+
+
+def _sse_deltas(resp):
+    """Content deltas from an OpenAI-style text/event-stream response."""
+    for line in resp.iter_lines():
+        # decode ourselves: SSE responses carry no charset, and requests would assume Latin-1
+        line = line.decode("utf-8").strip()
+        if not line.startswith("data:"):
+            continue
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            return
+        choices = json.loads(data).get("choices") or [{}]
+        delta = choices[0].get("delta", {}).get("content")
+        if delta:
+            yield delta
+
+
+def stream_groq_response(query: str, language: str = "English",
+                         context: str = "", system_override: str = ""):
+    """
+    Same as get_groq_response, but yields the answer in pieces as Groq
+    generates them (for st.write_stream). Cached answers and error/offline
+    messages are yielded as a single piece; a completed stream is cached.
+    """
+    payload = build_payload(query, language, context, system_override)
+    cache, key, cached = _cache_lookup(payload, language)
+    if cached is not None:
+        yield cached
+        return
+
+    api_key = _api_key()
+    if not api_key:
+        yield _missing_key_message(context)
+        return
+
+    parts = []
+    try:
+        resp = _post(_headers(api_key), dict(payload, stream=True), stream=True)
+        with resp:
+            for delta in _sse_deltas(resp):
+                parts.append(delta)
+                yield delta
+    except Exception as e:
+        yield ("\n\n" if parts else "") + _error_message(e, context)
+        return
+
+    answer = "".join(parts)
+    if cache is not None and answer:
+        cache.set(key, answer)
 
 
 def get_groq_models():
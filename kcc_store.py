@@ -0,0 +1,75 @@
+"""
+Columnar (Parquet) storage for the cleaned KCC corpus
+Dictionary-encoded, zstd-compressed columns with row-group statistics.
+Readers memory-map the file and decode only the row groups they touch, so
+answer lookup by row id needs no full-file parse.
+"""
+
+import threading
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.corpus import KCC_PARQUET_PATH
+from utils.ttl_cache import TTLCache
+
+PARQUET_PATH = KCC_PARQUET_PATH
+ROW_GROUP_SIZE = 65536
+CACHED_ROW_GROUPS = 32
+
+SCHEMA = pa.schema([
+    ("question", pa.string()),
+    ("answer", pa.string()),
+    ("count", pa.int32()),   # raw rows collapsed into this one by preprocess.py
+])
+
+
+def open_writer(path: str = PARQUET_PATH) -> pq.ParquetWriter:
+    return pq.ParquetWriter(path, SCHEMA, compression="zstd",
+                            use_dictionary=True, write_statistics=True)
+
+
+def write_chunk(writer: pq.ParquetWriter, df):
+    """Append a question/answer/count DataFrame chunk."""
+    table = pa.Table.from_pandas(df, schema=SCHEMA, preserve_index=False)
+    writer.write_table(table, row_group_size=ROW_GROUP_SIZE)
+
+
+def iter_pairs(path: str = PARQUET_PATH):
+    """Yield (question, answer) rows in row order, one record batch at a time."""
+    for batch in pq.ParquetFile(path, memory_map=True).iter_batches(columns=["question", "answer"]):
+        yield from zip(batch.column(0).to_pylist(), batch.column(1).to_pylist())
+
+
+class AnswerStore:
+    """
+    Row id -> answer, read lazily from the Parquet file.
+
+    Opening only reads the footer. The first lookup in a row group decodes
+    that group's answer column once; it is kept in a small LRU.
+    """
+
+    def __init__(self, path: str = PARQUET_PATH, column: str = "answer",
+                 cached_groups: int = CACHED_ROW_GROUPS):
+        self.file = pq.ParquetFile(path, memory_map=True)
+        meta = self.file.metadata
+        self.column = column
+        self._starts = np.cumsum([0] + [meta.row_group(i).num_rows for i in range(meta.num_row_groups)])
+        self._groups = TTLCache(cached_groups)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return int(self._starts[-1])
+
+    def __getitem__(self, row) -> str:
+        row = int(row)
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+        group = int(np.searchsorted(self._starts, row, side="right")) - 1
+        values = self._groups.get(group)
+        if values is None:
+            with self._lock:
+                values = self.file.read_row_group(group, columns=[self.column]).column(0)
+            self._groups.set(group, values)
+        return values[row - int(self._starts[group])].as_py()
@@ -0,0 +1,276 @@
+"""
+Live FAISS index for Kisan Sahayak
+Makes new knowledge-base entries semantically searchable within seconds,
+without re-encoding the whole KCC dataset
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+
+import faiss
+import numpy as np
+
+from utils.corpus import KB_PATH, doc_key, load_kb_entries
+from utils.embedding_stream import EMBEDDINGS_PATH, MODEL_NAME, load_embeddings
+from utils.vector_index import (INDEX_PATH, load_index, load_index_params, meta_path,
+                                save_index, search)
+
+# Fold the delta into the base index after this many entries or seconds
+COMPACT_EVERY = 256
+COMPACT_INTERVAL = 600
+
+
+def wal_path(index_path: str) -> str:
+    """Write-ahead log of entries added since the last compaction."""
+    return os.path.splitext(index_path)[0] + ".wal.jsonl"
+
+
+class LiveIndex:
+    """
+    Base FAISS index plus a small in-memory delta for new entries.
+
+    Vector ids are stable: the base index holds ids 0..N-1 (its build
+    order), and every added entry gets the next id, held in an
+    IndexIDMap2 over a flat delta index. Each add is appended to a JSONL
+    write-ahead log (with its vector, so replay needs no model) before it
+    becomes searchable. Compaction appends the delta to the base in id
+    order, so positions keep matching ids, rewrites the index file
+    atomically and truncates the log.
+
+    Log entries carry the build id of the base they were numbered against.
+    After a rebuild (publish_index), entries from an older build are not
+    replayed at their old ids; ones the new base lacks are re-added with
+    fresh ids.
+    """
+
+    def __init__(self, index_path: str = INDEX_PATH, encoder=None, vectors=None, row_keys=None,
+                 compact_every: int = COMPACT_EVERY, compact_interval: float = COMPACT_INTERVAL):
+        """
+        Args:
+            index_path: Base index written by embed.py / create_index.py
+            encoder: Object with .encode(list[str]); MiniLM is loaded on first add if None
+            vectors: Optional float vectors of the base rows, for re-ranking
+            row_keys: Doc keys of the base rows, from the embeddings sidecar
+            compact_every / compact_interval: Compaction thresholds
+        """
+        self.index_path = index_path
+        self.params = load_index_params(index_path)
+        self.base = load_index(index_path)
+        self.vectors = vectors
+        self.row_keys = row_keys or []
+        self.encoder = encoder
+        self.compact_every = compact_every
+        self.compact_interval = compact_interval
+
+        self.delta = faiss.IndexIDMap2(faiss.IndexFlatL2(self.base.d))
+        self.added_keys = {int(i): key for i, key in self.params.get("added_keys", {}).items()}
+        self.build_id = self.params.get("build_id")
+        self._lock = threading.RLock()
+        self._last_compact = time.time()
+        self.mtime = os.path.getmtime(index_path)
+        # Bumped whenever search results can change, so callers can drop cached hits
+        self.generation = 0
+        self._replay_wal()
+
+    @property
+    def ntotal(self) -> int:
+        return int(self.base.ntotal + self.delta.ntotal)
+
+    def _replay_wal(self):
+        path = wal_path(self.index_path)
+        if not os.path.exists(path):
+            return
+        current, stale = [], []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if entry.get("build") != self.build_id:
+                    stale.append(entry)   # numbered against a base that was since rebuilt
+                # Entries at or below the base size were compacted before a crash
+                elif entry["id"] >= self.ntotal:
+                    self._add_vector(entry["id"], entry["key"], entry["vector"])
+                    current.append(line)
+        if not stale:
+            return
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.writelines(current)
+        os.replace(tmp_path, path)
+        known = set(self.row_keys) | set(self.added_keys.values())
+        missing = {}
+        for entry in stale:
+            if entry["key"] not in known:
+                missing[entry["key"]] = entry["vector"]
+        if missing:
+            self._append(list(missing.items()))
+
+    def _add_vector(self, vec_id: int, key: str, vector):
+        vec = np.asarray(vector, dtype=np.float32).reshape(1, -1)
+        self.delta.add_with_ids(vec, np.array([vec_id], dtype=np.int64))
+        self.added_keys[vec_id] = key
+
+    def _encode(self, texts):
+        if self.encoder is None:
+            from sentence_transformers import SentenceTransformer
+            self.encoder = SentenceTransformer(MODEL_NAME)
+        return np.asarray(self.encoder.encode(texts), dtype=np.float32)
+
+    def add(self, entries) -> list:
+        """
+        Embed and index new entries.
+
+        Args:
+            entries: [(doc_key, question), ...]
+
+        Returns:
+            Vector ids assigned to the entries, in order
+        """
+        if not entries:
+            return []
+        vectors = self._encode([question for _key, question in entries])
+        with self._lock:
+            ids = self._append([(key, vec) for (key, _question), vec in zip(entries, vectors)])
+            if (self.delta.ntotal >= self.compact_every
+                    or time.time() - self._last_compact >= self.compact_interval):
+                self.compact()
+        return ids
+
+    def _append(self, items) -> list:
+        """Log and index (doc_key, vector) pairs under the next ids."""
+        ids = []
+        with self._lock:
+            with open(wal_path(self.index_path), 'a', encoding='utf-8') as f:
+                for key, vec in items:
+                    vec_id = self.ntotal
+                    f.write(json.dumps({"id": vec_id, "key": key, "build": self.build_id,
+                                        "vector": [round(float(x), 6) for x in vec]}) + "\n")
+                    self._add_vector(vec_id, key, vec)
+                    ids.append(vec_id)
+                f.flush()
+                os.fsync(f.fileno())
+            self.generation += 1
+        return ids
+
+    def compact(self):
+        """Fold the delta into the base index and truncate the write-ahead log."""
+        with self._lock:
+            self._last_compact = time.time()
+            if self.delta.ntotal == 0:
+                return
+            ids = faiss.vector_to_array(self.delta.id_map)
+            order = np.argsort(ids)
+            vectors = np.vstack([self.delta.reconstruct(int(i)) for i in ids[order]])
+            self.base.add(vectors)
+
+            params = {**self.params, "added_keys": {str(i): k for i, k in self.added_keys.items()}}
+            tmp_path = self.index_path + ".tmp"
+            save_index(self.base, params, tmp_path)
+            os.replace(tmp_path, self.index_path)
+            os.replace(meta_path(tmp_path), meta_path(self.index_path))
+            open(wal_path(self.index_path), 'w').close()
+
+            self.params = params
+            self.delta.reset()
+            self.mtime = os.path.getmtime(self.index_path)
+            self.generation += 1
+
+    def is_stale(self) -> bool:
+        """True when the index file was rebuilt by another process since it was loaded."""
+        try:
+            return os.path.getmtime(self.index_path) != self.mtime
+        except OSError:
+            return False
+
+    def search(self, queries, k: int):
+        """
+        Search base and delta together.
+
+        Returns:
+            (distances, ids) shaped (n_queries, k); ids are stable vector ids
+        """
+        queries = np.ascontiguousarray(queries, dtype=np.float32)
+        with self._lock:
+            # Float vectors cover the original build; rows compacted in later keep index distances
+            vectors = self.vectors
+            if vectors is not None and len(vectors) > self.base.ntotal:
+                vectors = None
+            dist, ids = search(self.base, queries, k, vectors, self.params.get("rerank", 0))
+            if self.delta.ntotal == 0:
+                return dist, ids
+            d_dist, d_ids = self.delta.search(queries, k)
+
+        all_dist = np.hstack([dist, d_dist])
+        all_ids = np.hstack([ids, d_ids])
+        all_dist[all_ids < 0] = np.inf
+        order = np.argsort(all_dist, axis=1)[:, :k]
+        return (np.take_along_axis(all_dist, order, axis=1),
+                np.take_along_axis(all_ids, order, axis=1))
+
+    def doc_key(self, vec_id: int):
+        """Corpus doc key of a vector id (None if unknown)."""
+        vec_id = int(vec_id)
+        if 0 <= vec_id < len(self.row_keys):
+            return self.row_keys[vec_id]
+        return self.added_keys.get(vec_id)
+
+
+def publish_index(index, params: dict, index_path: str = INDEX_PATH, encoder=None,
+                  kb_path: str = KB_PATH):
+    """
+    Replace the base index after a full rebuild (embed.py / create_index.py).
+
+    The build gets a fresh build id and the old write-ahead log is removed,
+    so its ids are never replayed against the new base. The rebuild only
+    encodes the KCC rows, so knowledge-base entries are then re-added
+    and compacted in, keeping them searchable.
+
+    Args:
+        index / params: From vector_index.build_index
+        encoder: Model used to embed the KB questions (MiniLM is loaded if None)
+    """
+    params = {k: v for k, v in params.items() if k != "added_keys"}
+    params["build_id"] = uuid.uuid4().hex
+    tmp_path = index_path + ".tmp"
+    save_index(index, params, tmp_path)
+    os.replace(tmp_path, index_path)
+    os.replace(meta_path(tmp_path), meta_path(index_path))
+    if os.path.exists(wal_path(index_path)):
+        os.remove(wal_path(index_path))
+
+    entries = {}
+    for item in load_kb_entries(kb_path):
+        if item.get("question") and item.get("answer"):
+            entries.setdefault(doc_key(item["question"], item["answer"]), item["question"])
+    if entries:
+        live = LiveIndex(index_path, encoder=encoder)
+        live.add(list(entries.items()))
+        live.compact()
+        print(f"Re-added {len(entries)} knowledge-base entries to the index")
+
+
+_LIVE = None
+_LIVE_LOCK = threading.Lock()
+
+
+def get_live_index(index_path: str = INDEX_PATH, embeddings_path: str = EMBEDDINGS_PATH):
+    """
+    Process-wide LiveIndex, or None if no index has been built yet.
+    Reloaded when embed.py / create_index.py rewrites the index file.
+    """
+    global _LIVE
+    with _LIVE_LOCK:
+        if _LIVE is not None and _LIVE.is_stale():
+            _LIVE = None
+        if _LIVE is None and os.path.exists(index_path):
+            vectors, row_keys = None, None
+            if os.path.exists(embeddings_path):
+                vectors, meta = load_embeddings(embeddings_path, MODEL_NAME)
+                row_keys = meta["row_keys"]
+            _LIVE = LiveIndex(index_path, vectors=vectors, row_keys=row_keys)
+    return _LIVE
@@ -5,9 +5,6 @@ Uses Agmarknet API or returns offline MSP data
 
 import os
 import requests
-from dotenv import load_dotenv
-
-load_dotenv()
 
 
 # MSP data 2024-25 as offline fallback
@@ -1,12 +1,17 @@
 """
 Offline Search Module for Kisan Sahayak
-Uses FAISS for vector similarity search + keyword fallback
+Hybrid retrieval: BM25F keyword search + FAISS vector similarity search
 Works completely offline without internet connection
 """
 
 import json
 import os
-import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from utils.corpus import KB_PATH, SOURCE_KB, build_corpus, doc_key
+from utils.text_index import InvertedIndex, tokenize
 
 # Offline knowledge base - comprehensive agricultural Q&A
 OFFLINE_KB = [
@@ -57,10 +62,201 @@ OFFLINE_KB = [
     {"q": "mandi market prices daily", "a": "How to Check Daily Mandi Prices:\n\n1. Agmarknet Portal: agmarknet.gov.in\n2. eNAM: enam.gov.in\n3. APMC Apps: State-specific apps\n4. Kisan Suvidha App (Govt of India)\n\nCurrent MSP 2024-25:\n- Wheat: ₹2,275/quintal\n- Paddy: ₹2,300/quintal\n- Cotton (Medium): ₹7,121/quintal\n- Maize: ₹2,225/quintal\n- Soybean: ₹4,892/quintal\n- Mustard: ₹5,950/quintal\n- Groundnut: ₹6,783/quintal\n- Arhar (Toor): ₹7,550/quintal\n\nNote: Market prices may be higher or lower than MSP. Sell when prices are favorable."},
 ]
 
+# Unified corpus + keyword index, loaded once per process and shared by
+# every Streamlit session (module state lives as long as the server)
+_LOCK = threading.Lock()
+_CORPUS = None
+_INDEX = None
+
+# New KB entries are searched from a small pending delta and merged into the
+# keyword index's arrays once this many have accumulated
+MERGE_PENDING = 256
+_MERGE_LOCK = threading.Lock()
+
+
+def _load():
+    """Build the corpus and its BM25F index on first use."""
+    global _CORPUS, _INDEX
+    with _LOCK:
+        if _CORPUS is None:
+            corpus = build_corpus(OFFLINE_KB)
+            _INDEX = InvertedIndex(corpus.docs)
+            _CORPUS = corpus
+    return _CORPUS, _INDEX
+
+
+def get_corpus():
+    """Return the shared offline corpus (builtin + KB + KCC)."""
+    return _load()[0]
+
+
+# Hybrid retrieval: BM25F runs inline on the calling thread while the
+# semantic retriever runs on its own small pool with a latency budget
+# (seconds); it is dropped from the fusion if it overruns or every worker
+# is still busy with an earlier query (e.g. while MiniLM loads)
+SEMANTIC_BUDGET = 0.6
+SEMANTIC_WORKERS = 2
+RETRIEVER_WEIGHT = {"lexical": 1.0, "semantic": 1.0}
+CANDIDATES = 20       # hits taken from each retriever before fusion
+RRF_K = 60            # reciprocal-rank fusion damping constant
+FUSION = "rrf"        # "rrf" or "weighted" (min-max normalised scores)
+
+_SEMANTIC_POOL = ThreadPoolExecutor(max_workers=SEMANTIC_WORKERS, thread_name_prefix="semantic")
+_SEMANTIC_SLOTS = threading.BoundedSemaphore(SEMANTIC_WORKERS)
+
+
+def _lexical_search(query: str, k: int) -> list:
+    """BM25F over the postings of the query keywords -> [(doc_id, score)]."""
+    _corpus, index = _load()
+    keywords = tokenize(query)
+    with _LOCK:
+        return index.search(keywords, k)
+
+
+def _get_searcher():
+    try:
+        from utils.semantic_search import get_semantic_searcher
+        return get_semantic_searcher()
+    except (ImportError, OSError):
+        return None  # faiss / sentence-transformers / local model not available
+
+
+def _doc_hits(key_hits) -> list:
+    """[(doc_key, L2^2 distance)] -> [(doc_id, cosine similarity)]."""
+    corpus = get_corpus()
+    hits = []
+    for key, dist in key_hits:
+        doc = corpus.get_by_key(key)
+        if doc is not None:
+            hits.append((doc["id"], 1.0 - dist / 2.0))
+    return hits
+
+
+def _semantic_search(query: str, k: int) -> list:
+    """MiniLM + FAISS -> [(doc_id, similarity)]; empty if not set up."""
+    searcher = _get_searcher()
+    if searcher is None:
+        return []
+    return _doc_hits(searcher.search(query, k))
+
+
+def _submit_semantic(query: str, k: int):
+    """Start a semantic search, or return None if earlier ones still hold every worker."""
+    if not _SEMANTIC_SLOTS.acquire(blocking=False):
+        return None
+    try:
+        future = _SEMANTIC_POOL.submit(_semantic_search, query, k)
+    except Exception:
+        _SEMANTIC_SLOTS.release()
+        raise
+    future.add_done_callback(lambda _f: _SEMANTIC_SLOTS.release())
+    return future
+
+
+def fuse(ranked_lists: dict, method: str = FUSION, weights: dict = None) -> list:
+    """
+    Merge per-retriever rankings into one.
+
+    Args:
+        ranked_lists: {retriever_name: [(doc_id, score), ...] best first}
+        method: "rrf" (weight / (RRF_K + rank)) or "weighted" (min-max
+                normalised scores times weight)
+
+    Returns:
+        [(doc_id, fused_score), ...] best first
+    """
+    weights = weights or RETRIEVER_WEIGHT
+    fused = {}
+    for name, hits in ranked_lists.items():
+        w = weights.get(name, 1.0)
+        if method == "rrf":
+            for rank, (doc_id, _score) in enumerate(hits, start=1):
+                fused[doc_id] = fused.get(doc_id, 0.0) + w / (RRF_K + rank)
+        else:
+            if not hits:
+                continue
+            scores = [score for _doc_id, score in hits]
+            lo, hi = min(scores), max(scores)
+            for doc_id, score in hits:
+                norm = (score - lo) / (hi - lo) if hi > lo else 1.0
+                fused[doc_id] = fused.get(doc_id, 0.0) + w * norm
+    return sorted(fused.items(), key=lambda item: -item[1])
+
+
+def hybrid_search(query: str, top_k: int = 3) -> list:
+    """
+    Run keyword and vector retrieval concurrently and fuse the results.
+
+    Keyword search runs inline, so it never waits for a worker. Vector
+    search that misses SEMANTIC_BUDGET is skipped for this query (it keeps
+    running in the background, e.g. while the model loads), and no new one
+    is started while earlier ones occupy every worker, so a slow path never
+    stalls the page.
+
+    Returns:
+        [(doc_id, fused_score), ...] best first, at most top_k entries
+    """
+    _load()   # corpus/index load is a one-off, not charged to the semantic budget
+    start = time.perf_counter()
+    k = max(CANDIDATES, top_k)
+    semantic = _submit_semantic(query, k)
+    ranked = {}
+    try:
+        ranked["lexical"] = _lexical_search(query, k)
+    except Exception as e:
+        print(f"lexical retriever error: {e}")
+
+    if semantic is None:
+        print("semantic retriever busy, skipped")
+    else:
+        remaining = SEMANTIC_BUDGET - (time.perf_counter() - start)
+        try:
+            ranked["semantic"] = semantic.result(timeout=max(remaining, 0.0))
+        except TimeoutError:
+            print("semantic retriever over budget, skipped")
+        except Exception as e:
+            print(f"semantic retriever error: {e}")
+    return fuse(ranked)[:top_k]
+
+
+def hybrid_search_many(queries: list, top_k: int = 3) -> list:
+    """
+    hybrid_search for a batch of queries without latency budgets (for the
+    retrieval service): all queries are embedded in one model call and
+    searched with one FAISS call; BM25F runs per query.
+
+    Returns:
+        One [(doc_id, fused_score), ...] list per query
+    """
+    _load()
+    k = max(CANDIDATES, top_k)
+    searcher = _get_searcher()
+    semantic = ([_doc_hits(hits) for hits in searcher.search_many(queries, k)]
+                if searcher is not None and queries else [[] for _q in queries])
+    return [fuse({"lexical": _lexical_search(query, k), "semantic": hits})[:top_k]
+            for query, hits in zip(queries, semantic)]
+
+
+def _remote_answers(query: str, top_k: int):
+    """Answers from the local retrieval service, or None if none is configured/reachable."""
+    from utils.retrieval_service import get_client
+    client = get_client()
+    if client is None or not client.available:
+        return None
+    try:
+        return [hit["a"] for hit in client.search(query, top_k)]
+    except Exception as e:
+        print(f"Retrieval service unavailable, searching in-process: {e}")
+        return None
+
 
 def search_offline(query: str, top_k: int = 3) -> str:
     """
-    Search offline knowledge base using keyword matching.
+    Search the unified offline corpus with hybrid keyword + semantic retrieval.
+    
+    Uses the local retrieval service when KISAN_RETRIEVAL_URL is set, so
+    app workers share one warm model and index; otherwise (or if it is
+    down) searches in-process.
     
     Args:
         query: User query
@@ -69,63 +265,66 @@ def search_offline(query: str, top_k: int = 3) -> str:
     Returns:
         Combined answer string
     """
-    query_lower = query.lower()
-    
-    # Extract keywords
-    keywords = re.findall(r'\b\w{3,}\b', query_lower)
-    stop_words = {'how', 'what', 'when', 'where', 'which', 'does', 'can', 'the', 'for', 
-                  'and', 'with', 'are', 'this', 'that', 'from', 'have', 'been', 'will'}
-    keywords = [k for k in keywords if k not in stop_words]
-    
-    # Score each KB entry
-    scores = []
-    for i, entry in enumerate(OFFLINE_KB):
-        q_lower = entry["q"].lower()
-        score = 0
-        for kw in keywords:
-            if kw in q_lower:
-                score += 3  # Exact keyword match in question
-            if kw in entry["a"].lower():
-                score += 1  # Keyword in answer
-        scores.append((score, i))
-    
-    # Sort by score
-    scores.sort(reverse=True)
-    
-    # Get top results
-    results = []
-    for score, idx in scores[:top_k]:
-        if score > 0:
-            results.append(OFFLINE_KB[idx]["a"])
+    results = _remote_answers(query, top_k)
+    if results is None:
+        corpus = get_corpus()
+        results = [corpus[idx]["a"] for idx, _score in hybrid_search(query, top_k)]
     
     if results:
         return "\n\n---\n\n".join(results)
     
-    # Fallback: load from JSON if available
-    try:
-        kb_path = "knowledge_base/agricultural_kb.json"
-        if os.path.exists(kb_path):
-            with open(kb_path, 'r', encoding='utf-8') as f:
-                kb_data = json.load(f)
-            # Simple keyword search in loaded data
-            for item in kb_data:
-                if any(kw in item.get("question", "").lower() for kw in keywords):
-                    return item.get("answer", "No specific information found.")
-    except Exception:
-        pass
-    
     return ("ℹ️ No specific offline data found for this query. "
             "Please enable online mode for AI-powered answers, "
             "or consult your local Kisan Call Centre at 1800-180-1551.")
 
 
+def _add_to_vector_index(key: str, question: str):
+    """Embed a new entry into the live FAISS index, if semantic search is set up."""
+    try:
+        from utils.live_index import get_live_index
+    except ImportError:
+        return  # faiss not installed - keyword search only
+    try:
+        live = get_live_index()
+        if live is not None:
+            live.add([(key, question)])
+    except Exception as e:
+        print(f"Error updating vector index: {e}")
+
+
+def _merge_keyword_index(index):
+    """Fold pending docs into the BM25F arrays; the rebuild itself runs outside _LOCK."""
+    if not _MERGE_LOCK.acquire(blocking=False):
+        return   # another thread is already merging
+    try:
+        with _LOCK:
+            snap = index.snapshot()
+        state = index.build(snap)
+        with _LOCK:
+            index.install(state, snap)
+    finally:
+        _MERGE_LOCK.release()
+
+
+def index_kb_entry(question: str, answer: str, category: str = "general", vectors: bool = True):
+    """Make a new KB entry searchable in this process (keyword and, optionally, vector index)."""
+    key = doc_key(question, answer)
+    corpus, index = _load()
+    with _LOCK:
+        if corpus.get_by_key(key) is None:
+            index.add(corpus[corpus.add(question, answer, SOURCE_KB, category)])
+        merge = index.pending_docs >= MERGE_PENDING
+    if merge:
+        _merge_keyword_index(index)
+    if vectors:
+        _add_to_vector_index(key, question)
+
+
 def add_to_knowledge_base(question: str, answer: str, category: str = "general"):
     """Add new Q&A pair to offline knowledge base."""
-    kb_path = "knowledge_base/agricultural_kb.json"
-    
     try:
-        if os.path.exists(kb_path):
-            with open(kb_path, 'r', encoding='utf-8') as f:
+        if os.path.exists(KB_PATH):
+            with open(KB_PATH, 'r', encoding='utf-8') as f:
                 kb_data = json.load(f)
         else:
             kb_data = []
@@ -137,10 +336,27 @@ def add_to_knowledge_base(question: str, answer: str, category: str = "general")
             "timestamp": str(__import__('datetime').datetime.now())
         })
         
-        os.makedirs("knowledge_base", exist_ok=True)
-        with open(kb_path, 'w', encoding='utf-8') as f:
+        os.makedirs(os.path.dirname(KB_PATH), exist_ok=True)
+        with open(KB_PATH, 'w', encoding='utf-8') as f:
             json.dump(kb_data, f, ensure_ascii=False, indent=2)
         
+        # Make it searchable without a reload. With a retrieval service the
+        # service owns the vector index (and its write-ahead log); a corpus
+        # loaded later in this process picks the entry up from the file.
+        from utils.retrieval_service import get_client
+        client = get_client()
+        forwarded = False
+        if client is not None and client.available:
+            try:
+                client.add(question, answer, category)
+                forwarded = True
+            except Exception as e:
+                print(f"Error updating retrieval service: {e}")
+        if not forwarded:
+            index_kb_entry(question, answer, category)
+        elif _CORPUS is not None:
+            index_kb_entry(question, answer, category, vectors=False)
+        
         return True
     except Exception as e:
         print(f"Error adding to KB: {e}")
@@ -0,0 +1,166 @@
+"""
+ONNX Runtime query encoder for Kisan Sahayak
+all-MiniLM-L6-v2 exported to ONNX with dynamic int8 quantization, run on
+CPU with a Rust fast tokenizer. Produces the same mean-pooled, unit-length
+vectors as SentenceTransformer, without importing torch at query time.
+
+Optional: pip install onnxruntime tokenizers
+Export:   python -m utils.onnx_encoder --export   (needs torch + transformers once)
+Check:    python -m utils.onnx_encoder --verify   (cosine vs SentenceTransformer)
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import onnxruntime as ort
+from tokenizers import Tokenizer
+
+from utils.embedding_stream import BATCH_SIZE, MODEL_NAME
+
+ONNX_DIR = os.path.join("models", "minilm-onnx")
+FP32_FILE = "model.onnx"
+INT8_FILE = "model.int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+MAX_LENGTH = 256            # all-MiniLM-L6-v2 max_seq_length
+VERIFY_TOLERANCE = 0.99     # min cosine similarity to the PyTorch vectors
+
+
+def model_path(model_dir: str = ONNX_DIR, quantized: bool = True) -> str:
+    return os.path.join(model_dir, INT8_FILE if quantized else FP32_FILE)
+
+
+def is_exported(model_dir: str = ONNX_DIR) -> bool:
+    return (os.path.exists(model_path(model_dir))
+            and os.path.exists(os.path.join(model_dir, TOKENIZER_FILE)))
+
+
+def export(model_name: str = MODEL_NAME, model_dir: str = ONNX_DIR, opset: int = 14) -> str:
+    """
+    Export the transformer to ONNX and quantize its weights to int8.
+
+    Returns:
+        Path of the quantized model
+    """
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from transformers import AutoModel, AutoTokenizer
+
+    hf_name = f"sentence-transformers/{model_name}"
+    tokenizer = AutoTokenizer.from_pretrained(hf_name)
+    model = AutoModel.from_pretrained(hf_name).eval()
+    os.makedirs(model_dir, exist_ok=True)
+    tokenizer.save_pretrained(model_dir)   # writes tokenizer.json for the fast tokenizer
+
+    inputs = ["input_ids", "attention_mask", "token_type_ids"]
+    sample = tokenizer(["Farmer asked query on Weather"], return_tensors="pt")
+    dynamic = {name: {0: "batch", 1: "sequence"} for name in inputs + ["last_hidden_state"]}
+    with torch.no_grad():
+        torch.onnx.export(model, tuple(sample[name] for name in inputs),
+                          model_path(model_dir, quantized=False),
+                          input_names=inputs, output_names=["last_hidden_state"],
+                          dynamic_axes=dynamic, opset_version=opset)
+
+    quantize_dynamic(model_path(model_dir, quantized=False), model_path(model_dir),
+                     weight_type=QuantType.QInt8)
+    return model_path(model_dir)
+
+
+class OnnxEncoder:
+    """Drop-in for SentenceTransformer.encode / get_sentence_embedding_dimension."""
+
+    def __init__(self, model_dir: str = ONNX_DIR, quantized: bool = True,
+                 max_length: int = MAX_LENGTH, threads: int = 0):
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length)
+        pad_id = self.tokenizer.token_to_id("[PAD]") or 0
+        self.tokenizer.enable_padding(pad_id=pad_id, pad_token="[PAD]")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path(model_dir, quantized), options,
+                                            providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.dim = int(self.session.get_outputs()[0].shape[-1])
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def encode(self, texts, batch_size: int = BATCH_SIZE, **_kwargs) -> np.ndarray:
+        """(len(texts), dim) float32, mean-pooled over tokens and L2-normalised."""
+        texts = list(texts)
+        out = []
+        for start in range(0, len(texts), batch_size):
+            encoded = self.tokenizer.encode_batch(texts[start:start + batch_size])
+            ids = np.array([e.ids for e in encoded], dtype=np.int64)
+            mask = np.array([e.attention_mask for e in encoded], dtype=np.int64)
+            feeds = {"input_ids": ids, "attention_mask": mask}
+            if "token_type_ids" in self.input_names:
+                feeds["token_type_ids"] = np.zeros_like(ids)
+            hidden = self.session.run(None, feeds)[0]
+
+            weights = mask[..., None].astype(np.float32)
+            pooled = (hidden * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+            norms = np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            out.append((pooled / norms).astype(np.float32))
+        if not out:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.vstack(out)
+
+
+def _p50_ms(encoder, texts) -> float:
+    timings = []
+    for text in texts:
+        start = time.perf_counter()
+        encoder.encode([text])
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.percentile(timings, 50))
+
+
+def verify(model_dir: str = ONNX_DIR, n_texts: int = 200,
+           tolerance: float = VERIFY_TOLERANCE) -> bool:
+    """
+    Check that ONNX vectors are interchangeable with the PyTorch ones on KCC
+    questions (every cosine similarity >= tolerance) and compare latency.
+    """
+    from sentence_transformers import SentenceTransformer
+    from utils.corpus import load_kcc_pairs
+
+    texts = []
+    for question, _answer in load_kcc_pairs():
+        if question and question not in texts:
+            texts.append(question)
+        if len(texts) == n_texts:
+            break
+
+    reference = SentenceTransformer(MODEL_NAME)
+    encoder = OnnxEncoder(model_dir)
+    expected = np.asarray(reference.encode(texts, normalize_embeddings=True), dtype=np.float32)
+    cosine = np.einsum("ij,ij->i", expected, encoder.encode(texts))
+
+    sample = texts[:50]
+    torch_ms, onnx_ms = _p50_ms(reference, sample), _p50_ms(encoder, sample)
+    print(f"Cosine vs PyTorch over {len(texts)} questions: "
+          f"min {cosine.min():.4f}, mean {cosine.mean():.4f} (tolerance {tolerance})")
+    print(f"Single-query p50: PyTorch {torch_ms:.1f} ms, ONNX int8 {onnx_ms:.1f} ms "
+          f"({torch_ms / onnx_ms:.1f}x)")
+    return bool(cosine.min() >= tolerance)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ONNX Runtime MiniLM encoder")
+    parser.add_argument("--export", action="store_true", help="Export and quantize the model")
+    parser.add_argument("--verify", action="store_true", help="Compare with SentenceTransformer")
+    parser.add_argument("--model-dir", default=ONNX_DIR)
+    args = parser.parse_args()
+
+    if args.export:
+        print(f"Exported {export(model_dir=args.model_dir)}")
+    if args.verify:
+        ok = verify(args.model_dir)
+        print("OK" if ok else "FAILED: ONNX vectors differ from the PyTorch ones")
+        sys.exit(0 if ok else 1)
@@ -1,25 +1,83 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+
 import pandas as pd
 
-# Load raw file
-df = pd.read_csv("kcc1.csv")
+from utils.dedup import NearDuplicateIndex
+from utils.kcc_store import PARQUET_PATH, open_writer, write_chunk
 
-# Keep only required columns
-df = df[["QueryText", "KccAns"]]
+CHUNK_SIZE = 100000
 
-# Rename columns (important)
-df = df.rename(columns={
+# Required columns of the raw export, and their new names (important)
+COLUMNS = {
     "QueryText": "question",
     "KccAns": "answer"
-})
+}
+
+parser = argparse.ArgumentParser(description="Clean a raw KCC export into clean_kcc.csv / kcc_qa_pairs.parquet")
+parser.add_argument("--input", default="kcc1.csv", help="Raw KCC CSV export")
+parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Rows read per chunk")
+parser.add_argument("--json", action="store_true",
+                    help="Also write kcc_qa_pairs.json (superseded by the Parquet file)")
+args = parser.parse_args()
+
+start = time.perf_counter()
+near = NearDuplicateIndex()
+seen = {}       # exact (question, answer) digest -> cluster id
+counts = []     # raw rows per cluster, indexed by cluster id
+rows_in = 0
+tmp_path = "clean_kcc.csv.tmp"
+
+# First pass: stream the raw file, keeping the first row of each cluster of
+# exact and near-duplicates (MinHash/LSH)
+with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+    for chunk in pd.read_csv(args.input, usecols=list(COLUMNS), dtype=str, chunksize=args.chunk_size):
+        chunk = chunk.rename(columns=COLUMNS)[list(COLUMNS.values())]
+
+        # Remove empty rows
+        chunk = chunk.dropna()
+        rows_in += len(chunk)
 
-# Remove empty rows
-df = df.dropna()
+        keep = []
+        for question, answer in zip(chunk["question"], chunk["answer"]):
+            digest = hashlib.blake2b(f"{question}\x1f{answer}".encode("utf-8"), digest_size=8).digest()
+            cluster = seen.get(digest)
+            is_new = False
+            if cluster is None:
+                cluster, is_new = near.add(question, answer)
+                seen[digest] = cluster
+                if is_new:
+                    counts.append(0)
+            counts[cluster] += 1
+            keep.append(is_new)
 
-# Remove duplicates
-df = df.drop_duplicates()
+        chunk[keep].to_csv(f, header=f.tell() == 0, index=False)
+        elapsed = time.perf_counter() - start
+        print(f"  {rows_in} rows read, {len(counts)} kept ({rows_in / elapsed:.0f} rows/sec)")
 
-# Save cleaned file
-df.to_csv("clean_kcc.csv", index=False)
-df.to_json("kcc_qa_pairs.json", orient="records", indent=4)
+# Second pass: add the cluster sizes and write the cleaned files incrementally
+row = 0
+parquet_out = open_writer(PARQUET_PATH)
+json_out = open("kcc_qa_pairs.json", 'w', encoding='utf-8') if args.json else None
+with open("clean_kcc.csv", 'w', encoding='utf-8', newline='') as csv_out:
+    for chunk in pd.read_csv(tmp_path, dtype=str, keep_default_na=False, chunksize=args.chunk_size):
+        chunk["count"] = counts[row:row + len(chunk)]
+        chunk.to_csv(csv_out, header=row == 0, index=False)
+        write_chunk(parquet_out, chunk)
+        if json_out:
+            for i, record in enumerate(chunk.to_dict("records"), row):
+                json_out.write(("[\n" if i == 0 else ",\n") + json.dumps(record, ensure_ascii=False))
+        row += len(chunk)
+parquet_out.close()
+if json_out:
+    json_out.write("[]\n" if row == 0 else "\n]\n")
+    json_out.close()
+os.remove(tmp_path)
 
-print("Cleaning completed successfully!")
\ No newline at end of file
+elapsed = time.perf_counter() - start
+print(f"Kept {row} rows ({rows_in} before collapsing near-duplicates) "
+      f"in {elapsed:.1f}s ({rows_in / elapsed:.0f} rows/sec)")
+print("Cleaning completed successfully!")
@@ -0,0 +1,91 @@
+"""
+Cached app resources for Kisan Sahayak
+Streamlit re-executes app.py on every interaction; everything expensive is
+loaded here once per server process (st.cache_resource) or once per input
+(st.cache_data) and shared by all sessions. A background warm-up started
+with the server loads the corpus, model and index before the first farmer
+opens the app.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx
+
+from utils import config
+from utils.translations import TRANSLATIONS, get_text
+
+CSS_PATH = "static/style.css"
+WARMUP_ENV = "KISAN_WARMUP"   # set to "0" to disable the background warm-up
+
+
+@contextmanager
+def _timed(name: str):
+    start = time.perf_counter()
+    yield
+    print(f"[resources] {name} ready in {time.perf_counter() - start:.2f}s")
+
+
+@st.cache_data(show_spinner=False)
+def _read_css(path: str, mtime: float) -> str:
+    with open(path) as f:
+        return f.read()
+
+
+def load_css(path: str = CSS_PATH) -> str:
+    """Stylesheet text, re-read only when the file changes."""
+    return _read_css(path, os.path.getmtime(path))
+
+
+@st.cache_data(show_spinner=False)
+def translation_table(language: str) -> dict:
+    """Every UI string in one language: {key: text}."""
+    return {key: get_text(key, language) for key in TRANSLATIONS}
+
+
+@st.cache_resource(show_spinner=False)
+def corpus():
+    """Unified offline corpus and its keyword index (builtin + KB + KCC)."""
+    from utils.offline_search import get_corpus
+    with _timed("offline corpus"):
+        return get_corpus()
+
+
+@st.cache_resource(show_spinner=False)
+def semantic_searcher():
+    """MiniLM model + live FAISS index, or None when semantic search is not set up."""
+    try:
+        from utils.semantic_search import get_semantic_searcher
+        with _timed("embedding model and FAISS index"):
+            return get_semantic_searcher()
+    except (ImportError, OSError) as e:
+        print(f"[resources] semantic search unavailable: {e}")
+        return None
+
+
+def _warm_up():
+    with _timed("warm-up"):
+        with _timed("pandas"):
+            import pandas  # noqa: F401 - first import takes about a second; later ones hit sys.modules
+        corpus()
+        from utils.retrieval_service import get_client
+        if get_client() is None:   # a retrieval service already holds a warm model and index
+            semantic_searcher()
+
+
+@st.cache_resource(show_spinner=False)
+def start_warmup():
+    """
+    Load the heavy resources on a background thread, once per server process.
+    The corpus and searcher are process-wide singletons, so search_offline
+    finds them warm too.
+    """
+    if config.get(WARMUP_ENV, "1") == "0":
+        return None
+    thread = threading.Thread(target=_warm_up, name="warm-up", daemon=True)
+    add_script_run_ctx(thread)
+    thread.start()
+    return thread
@@ -0,0 +1,112 @@
+"""
+On-disk LLM response cache for Kisan Sahayak
+Many prompts are fully determined by dropdowns (crop suggestion, learning
+topics, fertilizer plans), so the same completion is requested again and
+again. Successful completions are stored in SQLite, keyed by a hash of
+everything that affects the output, and served in milliseconds without
+using API quota.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from utils.corpus import normalize_text
+
+CACHE_PATH = "llm_cache.sqlite"
+DEFAULT_TTL = 7 * 24 * 3600   # seconds; farming advice does not go stale quickly
+DEFAULT_MAX_ENTRIES = 5000
+
+
+def cache_key(system: str, prompt: str, language: str, model: str, params: dict) -> str:
+    """
+    sha256 over (system prompt, normalised user prompt, language, model,
+    sampling params). The user prompt is normalised like corpus questions,
+    so case and spacing differences share one entry.
+    """
+    raw = json.dumps([system, normalize_text(prompt), language, model, params],
+                     sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    SQLite store of key -> completion text with TTL expiry. Once it holds
+    more than `max_entries`, the least recently used entries are evicted.
+    Safe to share between Streamlit session threads.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, ttl: float = DEFAULT_TTL,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS responses "
+                          "(key TEXT PRIMARY KEY, response TEXT, created REAL, accessed REAL)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self.conn.commit()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str):
+        """Cached completion, or None when missing or expired."""
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute("SELECT response, created FROM responses WHERE key = ?",
+                                    (key,)).fetchone()
+            if row and (not self.ttl or row[1] + self.ttl > now):
+                self.conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+                self.conn.commit()
+                self.hits += 1
+                return row[0]
+            if row:
+                self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.conn.commit()
+            self.misses += 1
+            return None
+
+    def set(self, key: str, response: str):
+        now = time.time()
+        with self._lock:
+            self.conn.execute("INSERT OR REPLACE INTO responses (key, response, created, accessed) "
+                              "VALUES (?, ?, ?, ?)", (key, response, now, now))
+            excess = self._size() - self.max_entries
+            if excess > 0:
+                self.conn.execute("DELETE FROM responses WHERE key IN (SELECT key FROM responses "
+                                  "ORDER BY accessed LIMIT ?)", (excess,))
+                self.evictions += excess
+            self.conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self.conn.execute("DELETE FROM responses")
+            self.conn.commit()
+
+    def _size(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def __len__(self):
+        with self._lock:
+            return self._size()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self),
+            "maxsize": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+    def close(self):
+        self.conn.close()
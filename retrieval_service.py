@@ -0,0 +1,236 @@
+"""
+Local retrieval service for Kisan Sahayak
+One long-lived process loads the corpus, keyword index, MiniLM model and
+FAISS index once and answers hybrid searches over localhost HTTP, so
+Streamlit reruns, app workers and CLI tools share one warm copy.
+
+Run:     python -m utils.retrieval_service [--host 127.0.0.1] [--port 8765]
+Use:     set KISAN_RETRIEVAL_URL=http://127.0.0.1:8765 for the app;
+         search_offline then queries the service and falls back to
+         in-process search if it is unreachable.
+
+Concurrent requests are micro-batched: queries arriving within
+BATCH_WINDOW seconds are embedded with one model call and searched with
+one FAISS call, then each is fused with its BM25F hits.
+"""
+
+import argparse
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from utils import config
+
+SERVICE_URL_ENV = "KISAN_RETRIEVAL_URL"
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+BATCH_WINDOW = 0.005   # seconds to wait for more queries before running a batch
+MAX_BATCH = 64
+REQUEST_TIMEOUT = 5.0  # client-side, seconds
+RETRY_AFTER = 30.0     # client stops trying an unreachable service for this long
+
+
+class MicroBatcher:
+    """Collects concurrent queries and runs them through hybrid search in batches."""
+
+    def __init__(self, window: float = BATCH_WINDOW, max_batch: int = MAX_BATCH):
+        self.window = window
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        threading.Thread(target=self._run, name="retrieval-batcher", daemon=True).start()
+
+    def submit(self, query: str, top_k: int) -> Future:
+        future = Future()
+        self._queue.put((query, top_k, future))
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0.0)))
+                except queue.Empty:
+                    break
+            try:
+                results = search_batch([query for query, _k, _f in batch],
+                                       max(k for _q, k, _f in batch))
+                for (_query, top_k, future), hits in zip(batch, results):
+                    future.set_result(hits[:top_k])
+            except Exception as e:
+                for _query, _k, future in batch:
+                    future.set_exception(e)
+
+
+def search_batch(queries: list, top_k: int) -> list:
+    """
+    Hybrid search for several queries: one model call and one FAISS search
+    for the whole batch.
+
+    Returns:
+        One list per query of {"id", "q", "a", "source", "score"} dicts
+    """
+    from utils.offline_search import get_corpus, hybrid_search_many
+
+    corpus = get_corpus()
+    results = []
+    for fused in hybrid_search_many(queries, top_k):
+        hits = []
+        for doc_id, score in fused:
+            doc = corpus[doc_id]
+            hits.append({"id": doc_id, "q": doc["q"], "a": doc["a"],
+                         "source": doc["source"], "score": round(float(score), 6)})
+        results.append(hits)
+    return results
+
+
+class _Handler(BaseHTTPRequestHandler):
+    batcher = None
+
+    def _reply(self, status: int, body: dict):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path != "/health":
+            return self._reply(404, {"error": "not found"})
+        from utils.offline_search import get_corpus
+        self._reply(200, {"status": "ok", "docs": len(get_corpus())})
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return self._reply(400, {"error": "invalid JSON"})
+        if not isinstance(body, dict):
+            return self._reply(400, {"error": "expected a JSON object"})
+
+        if self.path == "/search":
+            queries = body["queries"] if "queries" in body else [body.get("query", "")]
+            if (not isinstance(queries, list) or not queries
+                    or not all(isinstance(q, str) for q in queries)):
+                return self._reply(400, {"error": "queries must be a non-empty list of strings"})
+            try:
+                top_k = int(body.get("top_k", 3))
+            except (TypeError, ValueError):
+                top_k = 0
+            if top_k < 1:
+                return self._reply(400, {"error": "top_k must be a positive integer"})
+            futures = [self.batcher.submit(q, top_k) for q in queries]
+            try:
+                self._reply(200, {"results": [f.result() for f in futures]})
+            except Exception as e:
+                self._reply(500, {"error": str(e)})
+        elif self.path == "/add":
+            if not body.get("question") or not body.get("answer"):
+                return self._reply(400, {"error": "question and answer are required"})
+            from utils.offline_search import index_kb_entry
+            try:
+                index_kb_entry(str(body["question"]), str(body["answer"]),
+                               str(body.get("category") or "general"))
+            except Exception as e:
+                return self._reply(500, {"error": str(e)})
+            self._reply(200, {"status": "ok"})
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def log_message(self, format, *args):
+        pass   # one line per request is too noisy for a kiosk log
+
+
+def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+    """Load everything up front, then serve until interrupted."""
+    from utils.offline_search import get_corpus
+
+    start = time.perf_counter()
+    print(f"Loaded {len(get_corpus())} documents")
+    try:
+        from utils.semantic_search import get_semantic_searcher
+        searcher = get_semantic_searcher()
+        print("Semantic search ready" if searcher else "No FAISS index - keyword search only")
+    except (ImportError, OSError) as e:
+        print(f"Semantic search unavailable ({e}) - keyword search only")
+    print(f"Warm-up took {time.perf_counter() - start:.1f}s")
+
+    _Handler.batcher = MicroBatcher()
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    print(f"Retrieval service listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+class RetrievalClient:
+    """Thin client for a running retrieval service."""
+
+    def __init__(self, url: str, timeout: float = REQUEST_TIMEOUT):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        self._down_until = 0.0
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self._down_until
+
+    def _post(self, path: str, body: dict) -> dict:
+        try:
+            resp = self.session.post(self.url + path, json=body, timeout=self.timeout)
+            resp.raise_for_status()
+            return resp.json()
+        except requests.exceptions.HTTPError as e:
+            # A rejected request (4xx) says nothing about the service's health
+            if e.response.status_code >= 500:
+                self._down_until = time.monotonic() + RETRY_AFTER
+            raise
+        except requests.exceptions.RequestException:
+            self._down_until = time.monotonic() + RETRY_AFTER
+            raise
+
+    def search(self, query: str, top_k: int = 3) -> list:
+        """[{"id", "q", "a", "source", "score"}, ...] best first."""
+        return self._post("/search", {"query": query, "top_k": top_k})["results"][0]
+
+    def search_many(self, queries: list, top_k: int = 3) -> list:
+        return self._post("/search", {"queries": queries, "top_k": top_k})["results"]
+
+    def add(self, question: str, answer: str, category: str = "general"):
+        self._post("/add", {"question": question, "answer": answer, "category": category})
+
+
+_CLIENT = None
+
+
+def get_client():
+    """RetrievalClient for KISAN_RETRIEVAL_URL, or None when no service is configured."""
+    global _CLIENT
+    url = config.get(SERVICE_URL_ENV)
+    if not url:
+        return None
+    if _CLIENT is None or _CLIENT.url != url.rstrip("/"):
+        _CLIENT = RetrievalClient(url)
+    return _CLIENT
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Kisan Sahayak local retrieval service")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+    serve(args.host, args.port)
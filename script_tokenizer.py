@@ -0,0 +1,130 @@
+"""
+Script-aware tokenizer for Kisan Sahayak offline search
+Handles English and the Indic scripts used in KCC answers (Telugu, Hindi
+and other Devanagari, Tamil, Kannada, Malayalam, Bengali, Gujarati,
+Gurmukhi, Odia), so non-English questions match locally.
+
+Per word:
+  - NFC-normalise, lowercase, drop zero-width joiners and nuktas
+  - detect the script from its first letter
+  - Indic: strip trailing vowel signs / anusvara / virama (a light stemmer:
+    "फसलें" -> "फसल"), drop per-language stop words
+  - Dravidian (agglutinative): also emit akshara 3-grams, so a stem
+    matches its suffixed forms ("వాతావరణం" / "వాతావరణములో")
+"""
+
+import re
+import unicodedata
+
+# Letters, digits and combining marks; \w alone splits Indic words at every
+# vowel sign because matras are not alphanumeric. Dandas (0964/0965) split.
+WORD_PATTERN = re.compile(r'[\w\u0900-\u0963\u0966-\u0DFF]+')
+
+MIN_LATIN_LENGTH = 3      # English/Latin tokens shorter than this are dropped
+MIN_INDIC_AKSHARAS = 2    # Indic tokens need at least this many aksharas
+NGRAM_SIZE = 3            # aksharas per n-gram for agglutinative scripts
+
+SCRIPT_LATIN = "latin"
+
+# Unicode block start -> script; each block is 0x80 code points
+SCRIPT_BLOCKS = {
+    0x0900: "devanagari",
+    0x0980: "bengali",
+    0x0A00: "gurmukhi",
+    0x0A80: "gujarati",
+    0x0B00: "oriya",
+    0x0B80: "tamil",
+    0x0C00: "telugu",
+    0x0C80: "kannada",
+    0x0D00: "malayalam",
+}
+
+AGGLUTINATIVE_SCRIPTS = {"tamil", "telugu", "kannada", "malayalam"}
+
+STOP_WORDS = {
+    SCRIPT_LATIN: {'how', 'what', 'when', 'where', 'which', 'does', 'can', 'the', 'for',
+                   'and', 'with', 'are', 'this', 'that', 'from', 'have', 'been', 'will'},
+    # Hindi / Marathi
+    "devanagari": {'है', 'हैं', 'का', 'की', 'के', 'में', 'से', 'को', 'और', 'पर', 'यह', 'वह',
+                   'क्या', 'कैसे', 'कब', 'कौन', 'लिए', 'भी', 'तो', 'ही', 'था', 'थे', 'एक',
+                   'करें', 'करे', 'होता', 'होती', 'आणि', 'काय', 'कसे'},
+    "telugu": {'మరియు', 'లో', 'కు', 'ను', 'ఒక', 'ఈ', 'ఆ', 'ఏమి', 'ఎలా', 'ఎప్పుడు', 'ఉంది',
+               'ఉన్నాయి', 'ఉంటుంది', 'చేయాలి', 'కోసం', 'గురించి', 'మీ', 'అని'},
+    "tamil": {'மற்றும்', 'ஒரு', 'இந்த', 'அந்த', 'என்ன', 'எப்படி', 'எப்போது', 'உள்ளது'},
+    "kannada": {'ಮತ್ತು', 'ಒಂದು', 'ಈ', 'ಆ', 'ಏನು', 'ಹೇಗೆ', 'ಯಾವಾಗ', 'ಇದೆ'},
+    "malayalam": {'ഒരു', 'ഈ', 'ആ', 'എന്ത്', 'എങ്ങനെ', 'എപ്പോൾ', 'ഉണ്ട്', 'ഉം'},
+    "bengali": {'এবং', 'কি', 'কী', 'কেমন', 'এই', 'ওই', 'করে', 'হয়', 'জন্য'},
+    "gujarati": {'અને', 'શું', 'કેવી', 'આ', 'તે', 'છે', 'માટે'},
+    "gurmukhi": {'ਅਤੇ', 'ਕੀ', 'ਕਿਵੇਂ', 'ਇਹ', 'ਉਹ', 'ਹੈ', 'ਲਈ'},
+    "oriya": {'ଏବଂ', 'କଣ', 'କିପରି', 'ଏହି', 'ସେହି', 'ପାଇଁ'},
+}
+
+_INDIC_CHARS = [chr(c) for c in range(0x0900, 0x0E00)]
+_VIRAMAS = {ch for ch in _INDIC_CHARS if unicodedata.name(ch, "").endswith("VIRAMA")}
+_IGNORED = {"\u200c", "\u200d"}   # zero-width non-joiner / joiner
+_IGNORED.update(ch for ch in _INDIC_CHARS if unicodedata.name(ch, "").endswith("SIGN NUKTA"))
+
+
+def script_of(word: str) -> str:
+    """Script of a word, from its first character."""
+    code = ord(word[0])
+    return SCRIPT_BLOCKS.get(code & ~0x7F, SCRIPT_LATIN) if 0x0900 <= code < 0x0D80 else SCRIPT_LATIN
+
+
+def _is_mark(ch: str) -> bool:
+    return unicodedata.category(ch).startswith("M")
+
+
+def aksharas(word: str) -> list:
+    """Split an Indic word into aksharas: a letter plus its marks and conjuncts."""
+    clusters = []
+    for ch in word:
+        if clusters and (_is_mark(ch) or clusters[-1][-1] in _VIRAMAS):
+            clusters[-1] += ch
+        else:
+            clusters.append(ch)
+    return clusters
+
+
+def _normalize(word: str) -> str:
+    word = unicodedata.normalize("NFC", word).lower()
+    return "".join(ch for ch in word if ch not in _IGNORED)
+
+
+def _strip_matras(word: str) -> str:
+    """Drop trailing vowel signs, anusvara, visarga and virama (inflection endings)."""
+    end = len(word)
+    while end > 1 and _is_mark(word[end - 1]):
+        end -= 1
+    return word[:end]
+
+
+def _indic_tokens(word: str, script: str) -> list:
+    stem = _strip_matras(word)
+    clusters = aksharas(stem)
+    if len(clusters) < MIN_INDIC_AKSHARAS:
+        return []
+    tokens = [stem]
+    if script in AGGLUTINATIVE_SCRIPTS:
+        if len(clusters) > NGRAM_SIZE:
+            tokens.extend("".join(clusters[i:i + NGRAM_SIZE])
+                          for i in range(len(clusters) - NGRAM_SIZE + 1))
+    return tokens
+
+
+_STOP = {script: {_normalize(w) for w in words} for script, words in STOP_WORDS.items()}
+
+
+def tokenize(text: str) -> list:
+    """Split text into index terms (see module docstring)."""
+    tokens = []
+    for word in WORD_PATTERN.findall(_normalize(text or "")):
+        script = script_of(word)
+        if word in _STOP.get(script, ()):
+            continue
+        if script == SCRIPT_LATIN:
+            if len(word) >= MIN_LATIN_LENGTH:
+                tokens.append(word)
+        else:
+            tokens.extend(_indic_tokens(word, script))
+    return tokens
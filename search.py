@@ -1,16 +1,107 @@
-import faiss
+import argparse
+import csv
+import json
+import os
+import time
+
 import pandas as pd
-from sentence_transformers import SentenceTransformer
-import numpy as np
+
+from utils.corpus import KCC_PARQUET_PATH
+from utils.live_index import get_live_index
+from utils.semantic_search import SemanticSearcher, load_query_encoder
+
+BATCH_SIZE = 1024   # queries encoded and searched together in batch mode
+
+
+def read_query_batches(path, batch_size):
+    """Yield lists of query strings from a CSV (question column) or JSONL file."""
+    if path.endswith(".jsonl"):
+        batch = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                batch.append(str(item.get("question") or item.get("query") or ""))
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+    else:
+        # usecols fails on a headerless file instead of eating its first query as the header
+        for chunk in pd.read_csv(path, usecols=["question"], chunksize=batch_size):
+            yield chunk["question"].fillna("").astype(str).tolist()
+
+
+def write_results(writer, queries, D, I, answers, out_format):
+    for query, dists, ids in zip(queries, D, I):
+        results = [{"rank": rank, "answer": answers[i], "distance": round(float(d), 4)}
+                   for rank, (d, i) in enumerate(zip(dists, ids), 1)
+                   if 0 <= i < len(answers)]
+        if out_format == "jsonl":
+            writer.write(json.dumps({"query": query, "results": results}, ensure_ascii=False) + "\n")
+        else:
+            for r in results:
+                writer.writerow([query, r["rank"], r["answer"], r["distance"]])
+
+
+def run_batch(searcher, answers, in_path, out_path, k, batch_size):
+    """Answer every query in in_path: one batched encode and one matrix search per batch."""
+    out_format = "jsonl" if out_path.endswith(".jsonl") else "csv"
+    start = time.perf_counter()
+    n_queries = 0
+    with open(out_path, 'w', encoding='utf-8', newline='') as f:
+        writer = f if out_format == "jsonl" else csv.writer(f)
+        if out_format == "csv":
+            writer.writerow(["query", "rank", "answer", "distance"])
+        for queries in read_query_batches(in_path, batch_size):
+            D, I = searcher.live.search(searcher.embed_many(queries), k)
+            write_results(writer, queries, D, I, answers, out_format)
+            n_queries += len(queries)
+            elapsed = time.perf_counter() - start
+            print(f"  answered {n_queries} queries ({n_queries / elapsed:.1f} queries/sec)")
+
+    elapsed = time.perf_counter() - start
+    rate = n_queries / elapsed if elapsed else 0.0
+    print(f"Wrote top-{k} answers for {n_queries} queries to {out_path} "
+          f"in {elapsed:.1f}s ({rate:.1f} queries/sec)")
+
+
+parser = argparse.ArgumentParser(description="Search the KCC FAISS index")
+parser.add_argument("--batch", help="Answer every query in this CSV/JSONL file instead of prompting")
+parser.add_argument("--out", default="answers.jsonl", help="Batch output file (.jsonl or .csv)")
+parser.add_argument("--k", type=int, default=1, help="Answers per query")
+parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                    help="Queries encoded and searched together in batch mode")
+parser.add_argument("--encoder", choices=["auto", "onnx", "torch"], default=None,
+                    help="Query encoder backend (default: KISAN_ENCODER or auto)")
+args = parser.parse_args()
+
+if args.batch:
+    if not os.path.exists(args.batch):
+        parser.error(f"{args.batch} not found")
+    if not args.batch.endswith(".jsonl") and "question" not in pd.read_csv(args.batch, nrows=0).columns:
+        parser.error(f"{args.batch} needs a 'question' header row")
 
 print("Loading model (offline)...")
-model = SentenceTransformer("all-MiniLM-L6-v2", local_files_only=True)
+model = load_query_encoder(args.encoder)
 
 print("Loading FAISS index...")
-index = faiss.read_index("kcc_index.faiss")
+# Also loads the float vectors when the index was built with --rerank
+searcher = SemanticSearcher(get_live_index(), model)
+
+if os.path.exists(KCC_PARQUET_PATH):
+    # Row id -> answer straight from the memory-mapped Parquet file, no full parse
+    from utils.kcc_store import AnswerStore
+    answers = AnswerStore(KCC_PARQUET_PATH)
+else:
+    print("Loading cleaned CSV...")
+    answers = pd.read_csv("clean_kcc.csv")["answer"].tolist()
 
-print("Loading cleaned CSV...")
-df = pd.read_csv("clean_kcc.csv")
+if args.batch:
+    run_batch(searcher, answers, args.batch, args.out, args.k, args.batch_size)
+    raise SystemExit
 
 while True:
     query = input("\nEnter your question (or type exit): ")
@@ -18,11 +109,18 @@ while True:
     if query.lower() == "exit":
         break
 
-    query_embedding = model.encode([query])
+    # Repeated questions are answered from the embedding / result caches
+    D, I = searcher.search_ids(query, args.k)
 
-    D, I = index.search(np.array(query_embedding), k=1)
-
-    answer = df.iloc[I[0][0]]["answer"]
+    found = [answers[i] for i in I if 0 <= i < len(answers)]
+    if not found:
+        print("\nNo answer found in the cleaned KCC data")
+        continue
 
     print("\nAnswer:")
-    print(answer)
\ No newline at end of file
+    print("\n\n".join(found))
+
+stats = searcher.cache_stats()
+print(f"\nCache hits: embeddings {stats['embeddings']['hits']}/"
+      f"{stats['embeddings']['hits'] + stats['embeddings']['misses']}, "
+      f"results {stats['results']['hits']}/{stats['results']['hits'] + stats['results']['misses']}")
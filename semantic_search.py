@@ -0,0 +1,180 @@
+"""
+Semantic (vector) search for Kisan Sahayak
+MiniLM query embeddings against the live FAISS index, returning corpus
+doc keys so results can be fused with keyword search.
+
+KCC traffic is highly repetitive, so two caches sit in front of the model
+and the index: normalised query text -> embedding, and (embedding bucket,
+k) -> top-k ids. Repeated questions skip MiniLM inference and the FAISS
+scan entirely.
+"""
+
+import threading
+
+import numpy as np
+
+from utils import config
+from utils.corpus import normalize_text
+from utils.embedding_stream import BATCH_SIZE, MODEL_NAME
+from utils.live_index import get_live_index
+from utils.ttl_cache import TTLCache
+
+# MiniLM vectors are unit length, so L2^2 = 2 - 2*cosine. Hits further than
+# this (cosine < 0.35) are too weak to show to a farmer.
+MAX_DISTANCE = 1.3
+
+EMBEDDING_CACHE_SIZE = 4096
+RESULT_CACHE_SIZE = 4096
+CACHE_TTL = 3600   # seconds
+
+# Embeddings are bucketed onto a 1/64 grid per dimension before result lookup,
+# so near-identical queries (punctuation, word order noise) share one entry.
+BUCKET_SCALE = 64
+
+# Query encoder backend: "onnx" (int8 ONNX Runtime, see utils.onnx_encoder),
+# "torch" (SentenceTransformer) or "auto" (onnx when exported and installed)
+ENCODER_ENV = "KISAN_ENCODER"
+
+
+def load_query_encoder(backend: str = None, local_files_only: bool = True):
+    """MiniLM query encoder for the configured backend."""
+    backend = backend or config.get(ENCODER_ENV, "auto")
+    if backend in ("auto", "onnx"):
+        try:
+            from utils.onnx_encoder import OnnxEncoder, is_exported
+            if is_exported():
+                return OnnxEncoder()
+            if backend == "onnx":
+                raise OSError("ONNX model not exported; run python -m utils.onnx_encoder --export")
+        except ImportError:
+            if backend == "onnx":
+                raise
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(MODEL_NAME, local_files_only=local_files_only)
+
+
+class SemanticSearcher:
+    """Encodes queries with MiniLM and searches the live FAISS index."""
+
+    def __init__(self, live_index, model, max_distance: float = MAX_DISTANCE,
+                 cache_size: int = RESULT_CACHE_SIZE, cache_ttl: float = CACHE_TTL):
+        self.model = model
+        self.max_distance = max_distance
+        self.embedding_cache = TTLCache(EMBEDDING_CACHE_SIZE, cache_ttl)
+        self.result_cache = TTLCache(cache_size, cache_ttl)
+        self.set_index(live_index)
+
+    def set_index(self, live_index):
+        """Search a (re)loaded index; cached results for the old one are dropped."""
+        self.live = live_index
+        self.result_cache.clear()
+        # New KB entries are embedded with the same, already loaded model
+        if self.live.encoder is None:
+            self.live.encoder = self.model
+
+    def encode(self, queries, batch_size: int = BATCH_SIZE) -> np.ndarray:
+        return np.asarray(self.model.encode(list(queries), batch_size=batch_size), dtype=np.float32)
+
+    def embed_many(self, queries) -> np.ndarray:
+        """
+        (len(queries), dim) query embeddings. Texts seen before (after
+        normalisation) come from the cache; the rest are encoded once each,
+        in a single batched model call.
+        """
+        texts = [normalize_text(q) for q in queries]
+        vectors, missing = {}, {}
+        for text, query in zip(texts, queries):
+            if text in vectors or text in missing:
+                continue
+            vec = self.embedding_cache.get(text)
+            if vec is None:
+                missing[text] = query
+            else:
+                vectors[text] = vec
+        if missing:
+            for text, vec in zip(missing, self.encode(missing.values())):
+                vectors[text] = vec
+                self.embedding_cache.set(text, vec)
+        if not texts:
+            return np.zeros((0, self.live.base.d), dtype=np.float32)
+        return np.vstack([vectors[text] for text in texts])
+
+    def embed(self, query: str) -> np.ndarray:
+        """Query embedding, from the cache when the normalised text was seen before."""
+        return self.embed_many([query])[0]
+
+    def search_ids_many(self, queries, k: int = 5) -> list:
+        """
+        Nearest vector ids for several queries: one batched model call and
+        one FAISS search over the queries not in the result cache.
+
+        Returns:
+            One (distances, ids) pair of 1-D arrays per query
+        """
+        vecs = self.embed_many(queries)
+        out, keys, missing = [], [], []
+        for i, vec in enumerate(vecs):
+            # The generation changes on every add/compaction, so stale hits never match
+            bucket = np.round(vec * BUCKET_SCALE).astype(np.int8).tobytes()
+            keys.append((self.live.generation, bucket, k))
+            out.append(self.result_cache.get(keys[-1]))
+            if out[-1] is None:
+                missing.append(i)
+        if missing:
+            dist, ids = self.live.search(vecs[missing], k)
+            for row, i in enumerate(missing):
+                out[i] = (dist[row], ids[row])
+                self.result_cache.set(keys[i], out[i])
+        return out
+
+    def search_ids(self, query: str, k: int = 5):
+        """
+        Returns:
+            (distances, ids) - 1-D arrays of the k nearest vector ids
+        """
+        return self.search_ids_many([query], k)[0]
+
+    def cache_stats(self) -> dict:
+        return {"embeddings": self.embedding_cache.stats(), "results": self.result_cache.stats()}
+
+    def search(self, query: str, k: int = 5) -> list:
+        """
+        Returns:
+            [(doc_key, distance), ...] nearest first, within max_distance
+        """
+        return self.search_many([query], k)[0]
+
+    def search_many(self, queries, k: int = 5) -> list:
+        """search() for several queries, batched (see search_ids_many)."""
+        return [self._hits(dist, ids) for dist, ids in self.search_ids_many(queries, k)]
+
+    def _hits(self, dist, ids) -> list:
+        hits = []
+        for d, vec_id in zip(dist, ids):
+            if vec_id < 0 or d > self.max_distance:
+                continue
+            key = self.live.doc_key(vec_id)
+            if key is not None:
+                hits.append((key, float(d)))
+        return hits
+
+
+_SEARCHER = None
+_SEARCHER_LOCK = threading.Lock()
+
+
+def get_semantic_searcher():
+    """
+    Process-wide SemanticSearcher, or None when no index has been built or
+    the model is not available locally (keyword search still works).
+    """
+    global _SEARCHER
+    live = get_live_index()
+    with _SEARCHER_LOCK:
+        if live is None:
+            return None
+        if _SEARCHER is None:
+            _SEARCHER = SemanticSearcher(live, load_query_encoder())
+        elif _SEARCHER.live is not live:
+            _SEARCHER.set_index(live)   # index was rebuilt
+    return _SEARCHER
@@ -0,0 +1,215 @@
+"""
+Text indexing for Kisan Sahayak offline search
+Tokenizer + inverted index with BM25F ranking, built once when the
+knowledge base is loaded
+"""
+
+from collections import Counter, defaultdict
+
+import numpy as np
+
+from utils.script_tokenizer import tokenize
+
+# Field tags, in the row order used by the per-field arrays
+FIELD_QUESTION = "q"
+FIELD_ANSWER = "a"
+FIELDS = (FIELD_QUESTION, FIELD_ANSWER)
+
+# BM25F parameters: a term in the question counts 3x a term in the answer
+FIELD_WEIGHTS = {FIELD_QUESTION: 3.0, FIELD_ANSWER: 1.0}
+FIELD_B = {FIELD_QUESTION: 0.75, FIELD_ANSWER: 0.75}
+BM25_K1 = 1.2
+
+
+class InvertedIndex:
+    """
+    Term -> posting list of docs, ranked with BM25F.
+
+    Every document is tokenized exactly once, when it is added. Term
+    statistics are then frozen into compact NumPy arrays:
+
+        doc_freq       (n_terms,)          docs containing the term
+        idf            (n_terms,)          BM25 inverse document frequency
+        field_lengths  (n_fields, n_docs)  tokens per field
+        avg_lengths    (n_fields,)         mean tokens per field
+        post_offsets   (n_terms + 1,)      CSR offsets into the postings
+        post_docs      (n_postings,)       doc id of each posting
+        post_tf        (n_fields, n_postings)  term frequency per field
+        post_sat       (n_postings,)       saturated BM25F term weight
+
+    A query only slices the postings of its own terms and scores those
+    candidates in one vectorized pass, so latency grows with the size of
+    the postings rather than the size of the corpus.
+
+    Docs added after freezing sit in a small pending delta that search
+    scores alongside the arrays (against the frozen average lengths) until
+    the next merge. The tokenized postings are dropped once merged, so only
+    the arrays stay resident. Not thread-safe: callers serialise add,
+    search and install (offline_search holds its lock); build() only reads
+    a snapshot, so the heavy part of a merge can run outside that lock:
+
+        snap = index.snapshot()              # under the lock
+        state = index.build(snap)            # no lock
+        index.install(state, snap)           # under the lock
+    """
+
+    def __init__(self, docs=(), field_weights=None, field_b=None, k1: float = BM25_K1):
+        """
+        Args:
+            docs: Sequence of dicts with "q" (question) and "a" (answer) text.
+                  The position in the sequence is the doc id.
+            field_weights: Per-field boost, defaults to FIELD_WEIGHTS
+            field_b: Per-field length normalisation, defaults to FIELD_B
+            k1: BM25 term-frequency saturation
+        """
+        self.field_weights = np.array([(field_weights or FIELD_WEIGHTS)[f] for f in FIELDS],
+                                      dtype=np.float32)
+        self.field_b = np.array([(field_b or FIELD_B)[f] for f in FIELDS], dtype=np.float32)
+        self.k1 = k1
+
+        self.num_docs = 0
+        self._pending = defaultdict(list)   # term -> [(doc_id, tf_q, tf_a)], not yet merged
+        self._pending_lengths = []          # [(len_q, len_a)] of the pending docs
+        self.install(self._empty_state(), None)
+        for doc in docs:
+            self.add(doc)
+        self.freeze()
+
+    @property
+    def pending_docs(self) -> int:
+        """Docs added since the last merge."""
+        return len(self._pending_lengths)
+
+    def add(self, doc: dict) -> int:
+        """Index one document (into the pending delta) and return its doc id."""
+        doc_id = self.num_docs
+        counts = [Counter(tokenize(doc.get(field, ""))) for field in FIELDS]
+        for term in set(counts[0]) | set(counts[1]):
+            self._pending[term].append((doc_id, counts[0][term], counts[1][term]))
+        self._pending_lengths.append(tuple(sum(c.values()) for c in counts))
+        self.num_docs += 1
+        return doc_id
+
+    def freeze(self):
+        """Merge the pending docs into the NumPy arrays."""
+        if self._pending_lengths:
+            snap = self.snapshot()
+            self.install(self.build(snap), snap)
+
+    def snapshot(self):
+        """Copy of the pending delta, for build() to merge without holding a lock."""
+        return ({term: list(postings) for term, postings in self._pending.items()},
+                list(self._pending_lengths), self.num_docs)
+
+    def _empty_state(self) -> dict:
+        return {
+            "vocab": {},
+            "post_offsets": np.zeros(1, dtype=np.int64),
+            "post_docs": np.zeros(0, dtype=np.int32),
+            "post_tf": np.zeros((len(FIELDS), 0), dtype=np.float32),
+            "field_lengths": np.zeros((len(FIELDS), 0), dtype=np.float32),
+        }
+
+    def build(self, snap) -> dict:
+        """Frozen arrays for the current arrays plus a snapshot's pending docs."""
+        pending, lengths, num_docs = snap
+        vocab = dict(self.vocab)
+        for term in pending:
+            vocab.setdefault(term, len(vocab))
+
+        base_terms = np.repeat(np.arange(len(self.doc_freq), dtype=np.int64), self.doc_freq)
+        rows = [(vocab[term], *p) for term, postings in pending.items() for p in postings]
+        new = np.array(rows, dtype=np.int64).reshape(-1, 2 + len(FIELDS))
+        terms = np.concatenate([base_terms, new[:, 0]])
+        # Stable sort keeps each term's postings in doc order: frozen docs precede pending ones
+        order = np.argsort(terms, kind="stable")
+
+        doc_freq = np.bincount(terms, minlength=len(vocab)).astype(np.int32)
+        post_offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(doc_freq, out=post_offsets[1:])
+        field_lengths = np.array(lengths, dtype=np.float32).reshape(-1, len(FIELDS)).T
+        return {
+            "vocab": vocab,
+            "post_offsets": post_offsets,
+            "post_docs": np.concatenate([self.post_docs, new[:, 1].astype(np.int32)])[order],
+            "post_tf": np.hstack([self.post_tf, new[:, 2:].T.astype(np.float32)])[:, order],
+            "field_lengths": np.hstack([self.field_lengths, field_lengths]),
+            "merged_docs": num_docs,
+        }
+
+    def install(self, state: dict, snap):
+        """Swap in arrays from build() and drop the pending docs they now cover."""
+        self.vocab = state["vocab"]
+        self.post_offsets = state["post_offsets"]
+        self.post_docs = state["post_docs"]
+        self.post_tf = state["post_tf"]
+        self.field_lengths = state["field_lengths"]
+        self.doc_freq = np.diff(self.post_offsets).astype(np.int32)
+
+        n = self.field_lengths.shape[1]
+        self.avg_lengths = (np.maximum(self.field_lengths.mean(axis=1), 1.0) if n
+                            else np.ones(len(FIELDS), dtype=np.float32))
+        self.idf = self._idf(self.doc_freq, n)
+        self.post_sat = self._saturate(self.post_tf, self.field_lengths[:, self.post_docs])
+
+        if snap is not None:
+            merged = state["merged_docs"]
+            for term in list(self._pending):
+                rest = [p for p in self._pending[term] if p[0] >= merged]
+                if rest:
+                    self._pending[term] = rest
+                else:
+                    del self._pending[term]
+            del self._pending_lengths[:len(snap[1])]
+
+    def _idf(self, doc_freq, n: int):
+        return np.log1p((n - doc_freq + 0.5) / (doc_freq + 0.5)).astype(np.float32)
+
+    def _saturate(self, tf, lengths):
+        """BM25F: length-normalise each field, blend with field weights, saturate once."""
+        norm = 1.0 - self.field_b[:, None] + self.field_b[:, None] * (
+            lengths / self.avg_lengths[:, None])
+        pseudo_tf = (self.field_weights[:, None] * tf / norm).sum(axis=0)
+        return (pseudo_tf / (self.k1 + pseudo_tf)).astype(np.float32)
+
+    def search(self, terms, top_k: int = 3) -> list:
+        """
+        Rank the docs that contain any of the query terms.
+
+        Returns:
+            [(doc_id, score), ...] best first, at most top_k entries
+        """
+        terms = [t for t in set(terms) if t in self.vocab or t in self._pending]
+        if not terms or top_k <= 0:
+            return []
+
+        docs, contrib = [], []
+        first_pending = self.num_docs - self.pending_docs
+        pending_lengths = np.array(self._pending_lengths, dtype=np.float32).reshape(-1, len(FIELDS))
+        for term in terms:
+            pending = self._pending.get(term, ())
+            t = self.vocab.get(term)
+            if self._pending_lengths:   # pending docs change N and df, so recompute
+                df = len(pending) + (int(self.doc_freq[t]) if t is not None else 0)
+                idf = self._idf(df, self.num_docs)
+            else:
+                idf = self.idf[t]
+            if t is not None:
+                s = slice(self.post_offsets[t], self.post_offsets[t + 1])
+                docs.append(self.post_docs[s])
+                contrib.append(idf * self.post_sat[s])
+            if pending:
+                rows = np.array(pending, dtype=np.int64)
+                lengths = pending_lengths[rows[:, 0] - first_pending].T
+                docs.append(rows[:, 0].astype(np.int32))
+                contrib.append(idf * self._saturate(rows[:, 1:].T.astype(np.float32), lengths))
+        docs = np.concatenate(docs)
+        contrib = np.concatenate(contrib)
+
+        cand, inverse = np.unique(docs, return_inverse=True)
+        scores = np.bincount(inverse, weights=contrib)
+
+        k = min(top_k, len(cand))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(cand[i]), float(scores[i])) for i in top]
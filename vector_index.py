@@ -0,0 +1,340 @@
+"""
+FAISS index helpers for Kisan Sahayak semantic search
+Builds flat / IVF / HNSW / compressed (int8, PQ) indexes and measures their
+recall, latency and memory against exact (flat) search
+"""
+
+import json
+import math
+import os
+import time
+
+import faiss
+import numpy as np
+
+INDEX_PATH = "kcc_index.faiss"
+REPORT_PATH = "kcc_index_report.json"
+
+INDEX_TYPES = ("flat", "ivf-flat", "ivf-pq", "hnsw", "sq8", "pq")
+
+# Index types that store lossy codes instead of float32 vectors
+COMPRESSED_TYPES = ("ivf-pq", "sq8", "pq")
+
+DEFAULT_PARAMS = {
+    "nlist": 0,              # 0 = pick from corpus size
+    "nprobe": 8,
+    "pq_m": 48,              # sub-quantizers, must divide the dimension
+    "pq_bits": 8,
+    "hnsw_m": 32,
+    "ef_construction": 200,
+    "ef_search": 64,
+    "rerank": 0,             # re-rank this many candidates with float vectors (0 = off)
+}
+
+# Vectors are added in chunks and trained on a sample, so a memory-mapped
+# embeddings file is never copied into RAM as a whole
+ADD_CHUNK = 50000
+TRAIN_SAMPLE = 100000
+
+# Search-time values tried for the operating-point sweep in the report
+NPROBE_SWEEP = (1, 2, 4, 8, 16, 32, 64)
+EF_SEARCH_SWEEP = (16, 32, 64, 128, 256)
+
+
+def meta_path(index_path: str) -> str:
+    """Sidecar JSON that stores the index type and search parameters."""
+    return os.path.splitext(index_path)[0] + ".json"
+
+
+def default_nlist(n_vectors: int) -> int:
+    """~4*sqrt(N) lists, capped so every list gets ~39 training points."""
+    return max(1, min(int(4 * math.sqrt(n_vectors)), n_vectors // 39))
+
+
+def add_index_args(parser):
+    """Register the index-type options on an argparse parser."""
+    parser.add_argument("--index-type", choices=INDEX_TYPES, default="flat",
+                        help="FAISS index to build (default: flat)")
+    parser.add_argument("--nlist", type=int, default=DEFAULT_PARAMS["nlist"],
+                        help="IVF: number of inverted lists (0 = auto)")
+    parser.add_argument("--nprobe", type=int, default=DEFAULT_PARAMS["nprobe"],
+                        help="IVF: lists scanned per query")
+    parser.add_argument("--pq-m", type=int, default=DEFAULT_PARAMS["pq_m"],
+                        help="PQ / IVF-PQ: sub-quantizers per vector")
+    parser.add_argument("--pq-bits", type=int, default=DEFAULT_PARAMS["pq_bits"],
+                        help="PQ / IVF-PQ: bits per sub-quantizer code")
+    parser.add_argument("--hnsw-m", type=int, default=DEFAULT_PARAMS["hnsw_m"],
+                        help="HNSW: neighbours per graph node (M)")
+    parser.add_argument("--ef-construction", type=int, default=DEFAULT_PARAMS["ef_construction"],
+                        help="HNSW: candidate list size while building")
+    parser.add_argument("--ef-search", type=int, default=DEFAULT_PARAMS["ef_search"],
+                        help="HNSW: candidate list size while searching")
+    parser.add_argument("--rerank", type=int, default=DEFAULT_PARAMS["rerank"],
+                        help="Compressed indexes: re-rank this many candidates "
+                             "with the float vectors (0 = off)")
+    return parser
+
+
+def add_report_args(parser):
+    """Register the recall/latency report options on an argparse parser."""
+    parser.add_argument("--report-k", type=int, default=10, help="k for the recall@k report")
+    parser.add_argument("--report-queries", type=int, default=500,
+                        help="Sampled queries for the recall/latency report (0 = skip)")
+    return parser
+
+
+def params_from_args(args) -> dict:
+    return {name: getattr(args, name) for name in DEFAULT_PARAMS}
+
+
+def build_index(embeddings, index_type: str = "flat", **params):
+    """
+    Build and fill a FAISS index over float32 embeddings (L2 distance).
+
+    Args:
+        embeddings: (n, d) array or read-only memmap
+        index_type: One of INDEX_TYPES
+        **params: Overrides for DEFAULT_PARAMS
+
+    Returns:
+        (index, params) - params with resolved defaults, to save alongside
+    """
+    n, dim = embeddings.shape
+    params = {**DEFAULT_PARAMS, **params}
+
+    if index_type == "flat":
+        index = faiss.IndexFlatL2(dim)
+    elif index_type in ("ivf-flat", "ivf-pq"):
+        params["nlist"] = params["nlist"] or default_nlist(n)
+        quantizer = faiss.IndexFlatL2(dim)
+        if index_type == "ivf-flat":
+            index = faiss.IndexIVFFlat(quantizer, dim, params["nlist"])
+        else:
+            if dim % params["pq_m"]:
+                raise ValueError(f"pq_m={params['pq_m']} must divide dimension {dim}")
+            index = faiss.IndexIVFPQ(quantizer, dim, params["nlist"],
+                                     params["pq_m"], params["pq_bits"])
+        index.train(_training_sample(embeddings))
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, params["hnsw_m"])
+        index.hnsw.efConstruction = params["ef_construction"]
+    elif index_type == "sq8":
+        # One int8 code per dimension: 4x smaller than float32
+        index = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_L2)
+        index.train(_training_sample(embeddings))
+    elif index_type == "pq":
+        if dim % params["pq_m"]:
+            raise ValueError(f"pq_m={params['pq_m']} must divide dimension {dim}")
+        index = faiss.IndexPQ(dim, params["pq_m"], params["pq_bits"])
+        index.train(_training_sample(embeddings))
+    else:
+        raise ValueError(f"Unknown index type: {index_type}")
+
+    for start in range(0, n, ADD_CHUNK):
+        index.add(np.ascontiguousarray(embeddings[start:start + ADD_CHUNK], dtype=np.float32))
+    params["index_type"] = index_type
+    set_search_params(index, params)
+    return index, params
+
+
+def _training_sample(embeddings, seed: int = 0):
+    """Up to TRAIN_SAMPLE rows as a contiguous float32 array, for quantizer training."""
+    n = len(embeddings)
+    if n <= TRAIN_SAMPLE:
+        return np.ascontiguousarray(embeddings, dtype=np.float32)
+    rows = np.sort(np.random.default_rng(seed).choice(n, size=TRAIN_SAMPLE, replace=False))
+    return np.ascontiguousarray(embeddings[rows], dtype=np.float32)
+
+
+def set_search_params(index, params: dict):
+    """Apply search-time knobs (nprobe / efSearch); no-op for flat indexes."""
+    ivf = _as_ivf(index)
+    if ivf is not None:
+        ivf.nprobe = params.get("nprobe", DEFAULT_PARAMS["nprobe"])
+    hnsw = getattr(faiss.downcast_index(index), "hnsw", None)
+    if hnsw is not None:
+        hnsw.efSearch = params.get("ef_search", DEFAULT_PARAMS["ef_search"])
+
+
+def _as_ivf(index):
+    try:
+        return faiss.extract_index_ivf(index)
+    except RuntimeError:
+        return None
+
+
+def save_index(index, params: dict, index_path: str = INDEX_PATH):
+    """Write the index and its parameter sidecar."""
+    faiss.write_index(index, index_path)
+    meta = {**params, "ntotal": int(index.ntotal), "dimension": int(index.d)}
+    with open(meta_path(index_path), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+
+
+def load_index_params(index_path: str = INDEX_PATH) -> dict:
+    """Build parameters saved next to the index ({} for a bare index file)."""
+    if not os.path.exists(meta_path(index_path)):
+        return {}
+    with open(meta_path(index_path), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_index(index_path: str = INDEX_PATH):
+    """Read an index and re-apply the search parameters it was built with."""
+    index = faiss.read_index(index_path)
+    set_search_params(index, load_index_params(index_path))
+    return index
+
+
+def search(index, queries, k: int, vectors=None, rerank: int = 0):
+    """
+    Search the index, optionally re-ranking with exact float distances.
+
+    With a compressed index, distances come from lossy codes. When the
+    float vectors are available (an array or a read-only memmap) and
+    rerank > 0, the top `rerank` candidates are re-scored exactly and the
+    best k returned. Only the candidate rows are read from `vectors`.
+    Rows added after the build (ids >= len(vectors)) keep their index
+    distances.
+
+    Returns:
+        (distances, ids) shaped (n_queries, k), like index.search
+    """
+    queries = np.ascontiguousarray(queries, dtype=np.float32)
+    if vectors is None or rerank <= 0:
+        return index.search(queries, k)
+
+    cand_d, cand = index.search(queries, max(rerank, k))
+    out_d = np.full((len(queries), k), np.inf, dtype=np.float32)
+    out_i = np.full((len(queries), k), -1, dtype=np.int64)
+    for qi, row in enumerate(cand):
+        valid = row >= 0
+        ids, dist = row[valid], cand_d[qi][valid].astype(np.float32)
+        exact = ids < len(vectors)
+        order = np.argsort(ids[exact])
+        rows = ids[exact][order]
+        diff = np.asarray(vectors[rows], dtype=np.float32) - queries[qi]
+        dist[np.flatnonzero(exact)[order]] = np.einsum("ij,ij->i", diff, diff)
+        best = np.argsort(dist)[:k]
+        out_d[qi, :len(best)] = dist[best]
+        out_i[qi, :len(best)] = ids[best]
+    return out_d, out_i
+
+
+def index_size_bytes(index) -> int:
+    return int(faiss.serialize_index(index).size)
+
+
+def recall_at_k(found_ids, true_ids) -> float:
+    """Fraction of the exact top-k neighbours that the index also returned."""
+    k = true_ids.shape[1]
+    hits = sum(len(set(f[f >= 0]) & set(t)) for f, t in zip(found_ids, true_ids))
+    return hits / float(len(true_ids) * k)
+
+
+def measure_latency(index, queries, k: int, vectors=None, rerank: int = 0) -> dict:
+    """Single-query latency percentiles in milliseconds."""
+    timings = []
+    for i in range(len(queries)):
+        start = time.perf_counter()
+        search(index, queries[i:i + 1], k, vectors, rerank)
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "p50_ms": round(float(np.percentile(timings, 50)), 3),
+        "p99_ms": round(float(np.percentile(timings, 99)), 3),
+    }
+
+
+def evaluate_index(index, queries, true_ids, k: int, vectors=None, rerank: int = 0) -> dict:
+    """Recall@k against exact neighbours plus p50/p99 query latency."""
+    _, found = search(index, queries, k, vectors, rerank)
+    return {f"recall@{k}": round(recall_at_k(found, true_ids), 4),
+            **measure_latency(index, queries, k, vectors, rerank)}
+
+
+def sample_queries(embeddings, n_queries: int, seed: int = 0):
+    """Pick evaluation queries from the corpus vectors."""
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(vectors), size=min(n_queries, len(vectors)), replace=False)
+    return np.ascontiguousarray(vectors[np.sort(rows)])
+
+
+def build_report(index, params: dict, embeddings, k: int = 10,
+                 n_queries: int = 500, build_seconds: float = 0.0) -> dict:
+    """
+    Compare an index with exact flat search over sampled corpus queries.
+
+    The report holds the configured operating point plus a sweep over
+    nprobe (IVF) or efSearch (HNSW) so a different trade-off can be picked
+    without rebuilding. For compressed indexes it also reports the memory
+    saved versus flat and, when params["rerank"] is set, the recall
+    recovered by float re-ranking.
+    """
+    queries = sample_queries(embeddings, n_queries)
+    flat, _ = build_index(embeddings, "flat")
+    _, true_ids = flat.search(queries, k)
+
+    report = {
+        "index_type": params["index_type"],
+        "params": params,
+        "k": k,
+        "n_vectors": int(index.ntotal),
+        "n_queries": len(queries),
+        "build_seconds": round(build_seconds, 3),
+        "size_bytes": index_size_bytes(index),
+        "flat": {"size_bytes": index_size_bytes(flat), **measure_latency(flat, queries, k)},
+        "configured": evaluate_index(index, queries, true_ids, k),
+        "sweep": [],
+    }
+    report["memory_saved_bytes"] = report["flat"]["size_bytes"] - report["size_bytes"]
+    report["recall_lost"] = round(1.0 - report["configured"][f"recall@{k}"], 4)
+    if params.get("rerank"):
+        report["reranked"] = {"rerank": params["rerank"],
+                              **evaluate_index(index, queries, true_ids, k,
+                                               embeddings, params["rerank"])}
+
+    if params["index_type"] in ("ivf-flat", "ivf-pq"):
+        knob, values = "nprobe", [v for v in NPROBE_SWEEP if v <= params["nlist"]]
+    elif params["index_type"] == "hnsw":
+        knob, values = "ef_search", EF_SEARCH_SWEEP
+    else:
+        knob, values = None, ()
+
+    for value in values:
+        set_search_params(index, {**params, knob: value})
+        report["sweep"].append({knob: value, **evaluate_index(index, queries, true_ids, k)})
+    set_search_params(index, params)
+    return report
+
+
+def print_report(report: dict):
+    k = report["k"]
+    print(f"\nIndex: {report['index_type']}  vectors={report['n_vectors']}  "
+          f"queries={report['n_queries']}  build={report['build_seconds']}s  "
+          f"size={report['size_bytes'] / 1e6:.1f} MB (flat {report['flat']['size_bytes'] / 1e6:.1f} MB)")
+    print(f"Flat baseline: p50={report['flat']['p50_ms']} ms  p99={report['flat']['p99_ms']} ms")
+    print(f"Memory saved vs flat: {report['memory_saved_bytes'] / 1e6:.1f} MB")
+    conf = report["configured"]
+    print(f"Configured:    recall@{k}={conf[f'recall@{k}']}  p50={conf['p50_ms']} ms  p99={conf['p99_ms']} ms"
+          f"  (recall lost {report['recall_lost']})")
+    if "reranked" in report:
+        rr = report["reranked"]
+        print(f"Re-ranked {rr['rerank']}:  recall@{k}={rr[f'recall@{k}']}  "
+              f"p50={rr['p50_ms']} ms  p99={rr['p99_ms']} ms")
+    for row in report["sweep"]:
+        knob = next(key for key in row if not key.startswith(("recall", "p50", "p99")))
+        print(f"  {knob}={row[knob]:<4} recall@{k}={row[f'recall@{k}']:<7} "
+              f"p50={row['p50_ms']} ms  p99={row['p99_ms']} ms")
+
+
+def write_report(index, params: dict, embeddings, k: int, n_queries: int,
+                 build_seconds: float, report_path: str = REPORT_PATH) -> dict:
+    """Build, print and save the recall/latency/memory report."""
+    report = build_report(index, params, embeddings, k=k, n_queries=n_queries,
+                          build_seconds=build_seconds)
+    print_report(report)
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {report_path}")
+    return report
@@ -3,13 +3,10 @@ Weather utility for Kisan Sahayak
 Uses OpenWeatherMap free API
 """
 
-import os
 import requests
-from dotenv import load_dotenv
 
-load_dotenv()
+from utils import config
 
-WEATHER_API_KEY = os.getenv("WEATHER_API_KEY", "")
 WEATHER_BASE_URL = "http://api.openweathermap.org/data/2.5/weather"
 
 
@@ -23,7 +20,8 @@ def get_weather(location: str) -> dict | None:
     Returns:
         Weather data dict or None if unavailable
     """
-    if not WEATHER_API_KEY:
+    api_key = config.get("WEATHER_API_KEY")
+    if not api_key:
         # Return mock data when no API key
         return {
             "temp": 28,
@@ -37,7 +35,7 @@ def get_weather(location: str) -> dict | None:
     try:
         params = {
             "q": f"{location},IN",
-            "appid": WEATHER_API_KEY,
+            "appid": api_key,
             "units": "metric"
         }
         response = requests.get(WEATHER_BASE_URL, params=params, timeout=10)